@@ -0,0 +1,107 @@
+import multiprocessing
+from jinja import Config, expression_cache, infer_cache
+from parser import PlaybookParser
+from result_cache import ResultCache
+from session import AnalysisSession
+from summary import PlaybookSummary
+import ansible.plugins.filter.core
+import ansible.plugins.filter.mathstuff
+import ansible.plugins.filter.urls
+import ansible.plugins.filter.urlsplit
+
+# Config used by analyze_file, set up by init_worker in every process
+_config = None
+# (cache dir, salt) -> ResultCache, so file hashes are remembered between files
+_result_caches = {}
+# basedir -> AnalysisSession shared by the playbooks analyzed in this process
+_sessions = {}
+
+
+def build_config():
+  filters = [
+    ansible.plugins.filter.core.FilterModule(),
+    ansible.plugins.filter.mathstuff.FilterModule(),
+    ansible.plugins.filter.urls.FilterModule(),
+    ansible.plugins.filter.urlsplit.FilterModule()
+  ]
+  return Config(CUSTOM_FILTERS=filters)
+
+
+def init_worker(infer_cache_size=None):
+  global _config
+  _config = build_config()
+  if infer_cache_size is not None:
+    infer_cache.resize(infer_cache_size)
+    expression_cache.resize(infer_cache_size)
+
+
+def get_result_cache(cache_dir, basedir=None, with_history=False, history_size=None):
+  if _config is None:
+    init_worker()
+  salt = repr([basedir, with_history, history_size, _config.fingerprint()])
+  key = (cache_dir, salt)
+  if key not in _result_caches:
+    _result_caches[key] = ResultCache(cache_dir, salt=salt)
+  return _result_caches[key]
+
+
+def get_session(basedir=None):
+  if basedir not in _sessions:
+    _sessions[basedir] = AnalysisSession(basedir)
+  return _sessions[basedir]
+
+
+def reset_sessions():
+  """Drops the sessions, and the files cached by them, of this process."""
+  _sessions.clear()
+
+
+def analyze_file(filename, basedir=None, with_history=False, cache_dir=None, history_size=None, lazy=False):
+  """Returns the PlaybookSummary of filename. With with_history the last
+  history_size actions of every variable are listed, all if it is None.
+  With lazy and no cache_dir the summary walks the scopes when reported,
+  see PlaybookSummary.from_parser."""
+  if _config is None:
+    init_worker()
+  result_cache = None
+  if cache_dir is not None:
+    result_cache = get_result_cache(cache_dir, basedir=basedir, with_history=with_history, history_size=history_size)
+    summary = result_cache.get(filename)
+    if summary is not None:
+      return summary
+  parser = PlaybookParser(filename, basedir=basedir, jinja_config=_config, history_size=history_size if with_history else 0, session=get_session(basedir))
+  parser.process()
+  summary = PlaybookSummary.from_parser(parser, with_history=with_history, lazy=lazy and result_cache is None)
+  if result_cache is not None:
+    result_cache.put(filename, summary)
+  return summary
+
+
+def _analyze_file_star(args):
+  return analyze_file(*args)
+
+
+def analyze_files(filenames, basedir=None, with_history=False, jobs=1, infer_cache_size=None, cache_dir=None, history_size=None, lazy=False):
+  """Yields a PlaybookSummary per file, in the order of filenames.
+
+  With jobs > 1 the files are analyzed by a pool of worker processes and
+  summaries are yielded as soon as every file before them is done. With a
+  cache_dir, files whose dependencies did not change since the last run
+  are not analyzed again. lazy is passed to analyze_file when the files
+  are analyzed in this process.
+  """
+  if jobs <= 0:
+    jobs = multiprocessing.cpu_count()
+  if jobs == 1 or len(filenames) <= 1:
+    init_worker(infer_cache_size)
+    for filename in filenames:
+      yield analyze_file(filename, basedir=basedir, with_history=with_history, cache_dir=cache_dir, history_size=history_size, lazy=lazy)
+    return
+  pool = multiprocessing.Pool(processes=min(jobs, len(filenames)), initializer=init_worker, initargs=(infer_cache_size,))
+  try:
+    for summary in pool.imap(_analyze_file_star, [(filename, basedir, with_history, cache_dir, history_size) for filename in filenames]):
+      yield summary
+    pool.close()
+  finally:
+    pool.terminate()
+    pool.join()
@@ -0,0 +1,9 @@
+import os
+
+
+def get_mtime(path):
+  """Returns the mtime of path or None if it does not exist."""
+  try:
+    return os.stat(path).st_mtime
+  except OSError:
+    return None
@@ -1,3 +1,5 @@
 from .config import Config
-from .core import (parse, infer, infer_from_node)
+from .cache import LRUCache
+from .core import (parse, parse_expression, infer, infer_from_node, infer_simple, infer_expression, infer_cache,
+                   infer_counts, expression_cache, parse_cache)
 from .exceptions import InferException, MergeException, InvalidExpression, UnexpectedExpression
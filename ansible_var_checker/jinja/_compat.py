@@ -1,4 +1,5 @@
 import sys
+from collections import namedtuple
 
 PY2 = sys.version_info[0] == 2
 
@@ -22,3 +23,14 @@ else:
     from itertools import izip
 
     from itertools import izip_longest as zip_longest
+
+try:
+    from inspect import getfullargspec as _getfullargspec
+except ImportError:
+    from inspect import getargspec
+else:
+    ArgSpec = namedtuple('ArgSpec', 'args varargs keywords defaults')
+
+    def getargspec(func):
+        spec = _getfullargspec(func)
+        return ArgSpec(spec.args, spec.varargs, spec.varkw, spec.defaults)
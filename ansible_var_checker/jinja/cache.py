@@ -0,0 +1,81 @@
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """A bounded mapping which evicts the least recently used entry once it holds
+    more than :attr:`maxsize` entries.
+
+    .. attribute:: maxsize
+
+        Maximum number of entries. ``0`` disables caching, ``None`` means unbounded.
+
+    .. attribute:: hits
+
+        Number of :meth:`get` calls that found an entry.
+
+    .. attribute:: misses
+
+        Number of :meth:`get` calls that did not find an entry.
+
+    .. attribute:: evictions
+
+        Number of entries dropped to keep the cache within :attr:`maxsize`.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize == 0:
+            return
+        self._data.pop(key, None)
+        self._data[key] = value
+        self._evict()
+
+    def resize(self, maxsize):
+        """Changes :attr:`maxsize`, evicting entries if the cache became too small."""
+        self.maxsize = maxsize
+        self._evict()
+
+    def _evict(self):
+        if self.maxsize is None:
+            return
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drops all entries and resets the counters."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """Returns a :class:`dict` with the counters, the current size and :attr:`maxsize`."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
@@ -1,3 +1,8 @@
+from inspect import ismethod
+
+from ._compat import getargspec, iteritems
+
+
 class Config(object):
     """Configuration."""
 
@@ -41,6 +46,13 @@ class Config(object):
     """
 
     CUSTOM_FILTERS = []
+    """A list of custom filters. Every item is either a :class:`dict` that maps filter names to
+    functions or an object with ``filters`` method that returns such a :class:`dict`
+    (i.e., Ansible ``FilterModule``).
+
+    Filters are indexed by name on the first lookup (see :meth:`get_filter`). The index is rebuilt
+    if the list is replaced or extended; use :meth:`add_filters` to add filters.
+    """
 
     RAISE_ON_NO_FILTER = False
 
@@ -69,6 +81,115 @@ class Config(object):
         self.CUSTOM_FILTERS = CUSTOM_FILTERS
         self.RAISE_ON_NO_FILTER = RAISE_ON_NO_FILTER
         self.RAISE_ON_INVALID_FILTER_ARGS = RAISE_ON_INVALID_FILTER_ARGS
+        self._indexed_filters = None
+        self._indexed_filters_count = 0
+        self._filter_index = {}
+        self._filter_signatures = {}
+
+    def _build_filter_index(self):
+        index = {}
+        for filter_obj in self.CUSTOM_FILTERS:
+            if hasattr(filter_obj, 'filters') and ismethod(getattr(filter_obj, 'filters')):
+                filters_to_index = filter_obj.filters()
+            else:
+                filters_to_index = filter_obj
+            for name, func in iteritems(filters_to_index):
+                if name not in index:
+                    index[name] = func
+        self._indexed_filters = self.CUSTOM_FILTERS
+        self._indexed_filters_count = len(self.CUSTOM_FILTERS)
+        self._filter_index = index
+        self._filter_signatures = {}
+
+    def get_filter(self, name):
+        """Returns a :class:`FilterSignature` of the custom filter ``name`` or ``None``
+        if there is no such filter in :attr:`CUSTOM_FILTERS`.
+
+        If several filters share the name, the first one wins.
+        """
+        if (self._indexed_filters is not self.CUSTOM_FILTERS or
+                self._indexed_filters_count != len(self.CUSTOM_FILTERS)):
+            self._build_filter_index()
+        signature = self._filter_signatures.get(name)
+        if signature is None and name in self._filter_index:
+            signature = FilterSignature(name, self._filter_index[name])
+            self._filter_signatures[name] = signature
+        return signature
+
+    def add_filters(self, *filters):
+        """Appends ``filters`` to :attr:`CUSTOM_FILTERS` and invalidates the filter index."""
+        self.CUSTOM_FILTERS = list(self.CUSTOM_FILTERS) + list(filters)
+        self._indexed_filters = None
+
+    def fingerprint(self):
+        """Returns a hashable value that identifies all the settings affecting inference.
+
+        Configs with equal fingerprints produce equal structures for the same template,
+        so the fingerprint can be used as a part of a cache key.
+        """
+        return (
+            self.TYPE_OF_VARIABLE_INDEXED_WITH_VARIABLE_TYPE,
+            self.TYPE_OF_VARIABLE_INDEXED_WITH_INTEGER_TYPE,
+            self.BOOLEAN_CONDITIONS,
+            self.PACKAGE_NAME,
+            self.TEMPLATE_DIR,
+            self.RAISE_ON_NO_FILTER,
+            self.RAISE_ON_INVALID_FILTER_ARGS,
+            tuple(_get_filter_fingerprint(filter_obj) for filter_obj in self.CUSTOM_FILTERS),
+        )
+
+
+class FilterSignature(object):
+    """Arity of a custom filter.
+
+    .. attribute:: name
+
+        Name of the filter.
+
+    .. attribute:: min_arg_count
+
+        Minimal number of arguments the filter must be called with (the filtered value
+        is not counted).
+
+    .. attribute:: max_arg_count
+
+        Maximal number of arguments the filter can be called with. Is negative
+        if the filter function does not even accept the filtered value.
+
+    .. attribute:: has_varargs
+
+        Whether the filter function accepts ``*args``.
+
+    .. attribute:: has_kwargs
+
+        Whether the filter function accepts ``**kwargs``.
+    """
+    def __init__(self, name, func):
+        self.name = name
+        argspec = getargspec(func)
+        args = list(argspec.args)
+        default_args = argspec.args[-len(argspec.defaults):] if argspec.defaults is not None else []
+        if 'self' in args and 'self' not in default_args:
+            args.remove('self')
+        self.has_varargs = argspec.varargs is not None
+        self.has_kwargs = argspec.keywords is not None
+        self.max_arg_count = len(args) - 1
+        self.min_arg_count = self.max_arg_count - len(default_args)
+        if self.has_varargs:
+            self.max_arg_count += 1
+            self.min_arg_count += 1
+        if self.has_kwargs:
+            self.max_arg_count += 1
+            self.min_arg_count += 1
+
+
+def _get_filter_fingerprint(filter_obj):
+    if hasattr(filter_obj, 'filters') and ismethod(getattr(filter_obj, 'filters')):
+        cls = type(filter_obj)
+        return cls.__module__, cls.__name__
+    return tuple(sorted(
+        (name, getattr(func, '__module__', None), getattr(func, '__name__', repr(func)))
+        for name, func in filter_obj.items()))
 
 
 default_config = Config()
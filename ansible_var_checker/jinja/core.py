@@ -1,21 +1,118 @@
+import re
+
 import jinja2
+from jinja2.parser import Parser
 
+from .cache import LRUCache
 from .config import Config
-from .model import Dictionary
+from .exceptions import MergeException
+from .mergers import Accumulator
+from .model import Dictionary, Scalar
 from .visitors import visit
+from .visitors.expr import Context, visit_expr
 from . import _compat
 
 
-def parse(template, jinja2_env=None):
+infer_cache = LRUCache(maxsize=4096)
+"""An :class:`.cache.LRUCache` used by :func:`infer` to memoize results.
+
+Keys are pairs of a template and :meth:`.config.Config.fingerprint`. Use
+:meth:`~.cache.LRUCache.stats` to see how effective it is and
+:meth:`~.cache.LRUCache.resize` to size it.
+"""
+
+
+default_environment = jinja2.Environment()
+"""A :class:`jinja2.Environment` used by :func:`parse` when no environment is passed."""
+
+expression_cache = LRUCache(maxsize=4096)
+"""An :class:`.cache.LRUCache` used by :func:`infer_expression` to memoize results,
+keyed like :data:`infer_cache`.
+"""
+
+parse_cache = LRUCache(maxsize=4096)
+"""An :class:`.cache.LRUCache` used by :func:`parse` to keep NODEs of parsed sources,
+and by :func:`parse_expression` with ``('expression', source)`` keys.
+
+The cached NODEs are shared between callers and must not be modified.
+"""
+
+
+def parse(template, jinja2_env=None, cache=parse_cache):
     """Parses Jinja2 template and returns it's NODE.
 
+    If ``jinja2_env`` is not passed, :data:`default_environment` is used and
+    the NODE is looked up in (and stored to) ``cache``.
+
     :type template: basestring
     :type jinja2_env: :class:`jinja2.Environment`
+    :param cache: a cache for NODEs or ``None`` to disable caching
+    :type cache: :class:`.cache.LRUCache`
     :rtype: :class:`jinja2.nodes.Template`
     """
-    if jinja2_env is None:
-        jinja2_env = jinja2.Environment()
-    return jinja2_env.parse(template)
+    if jinja2_env is not None:
+        return jinja2_env.parse(template)
+    if cache is None or not isinstance(template, _compat.string_types):
+        return default_environment.parse(template)
+    node = cache.get(template)
+    if node is None:
+        node = default_environment.parse(template)
+        cache.put(template, node)
+    return node
+
+
+infer_counts = {'literal': 0, 'simple': 0, 'engine': 0}
+"""Number of :func:`infer` calls answered for strings without delimiters, for strings
+answered by :func:`infer_simple` and by the full engine (cached or not)."""
+
+_NAME = r'[A-Za-z_][A-Za-z0-9_]*'
+_PATH_ITEM = r'\.(' + _NAME + r')|\[\'([^\'\\\n]+)\'\]|\["([^"\\\n]+)"\]'
+_SIMPLE_EXPR_RE = re.compile(r'\{\{[ \t]*(' + _NAME + r')((?:' + _PATH_ITEM + r')*)[ \t]*\}\}')
+_SIMPLE_PATH_RE = re.compile(r'[ \t]*(' + _NAME + r')((?:' + _PATH_ITEM + r')*)[ \t]*\Z')
+_PATH_ITEM_RE = re.compile(_PATH_ITEM)
+# names the parser turns into constants or operators
+_RESERVED_NAMES = frozenset(['true', 'false', 'none', 'True', 'False', 'None',
+                             'and', 'or', 'not', 'in', 'is', 'if', 'else'])
+
+
+def _get_path_struct(match, lineno):
+    path = [match.group(1)]
+    for attr, single_quoted, double_quoted in _PATH_ITEM_RE.findall(match.group(2)):
+        path.append(attr or single_quoted or double_quoted)
+    value = Scalar(label=path[-1], linenos=[lineno])
+    for i in range(len(path) - 2, -1, -1):
+        value = Dictionary({path[i + 1]: value}, label=path[i], linenos=[lineno])
+    return Dictionary({path[0]: value})
+
+
+def infer_simple(template):
+    """Returns the structure :func:`infer` returns for ``template`` without parsing it, or
+    ``None`` if it contains anything else than text and ``{{ name }}``, ``{{ a.b.c }}`` or
+    ``{{ a['b'] }}`` expressions.
+
+    :type template: string
+    :rtype: :class:`.model.Dictionary`
+    """
+    if '{{' not in template:
+        if '{%' in template or '{#' in template:
+            return None
+        return Dictionary()
+    if '{%' in template or '{#' in template or '\r' in template:
+        return None
+    rv = Accumulator()
+    pos = template.find('{{')
+    while pos != -1:
+        match = _SIMPLE_EXPR_RE.match(template, pos)
+        if match is None or match.group(1) in _RESERVED_NAMES:
+            return None
+        # the expressions of an output are merged like visit_many does
+        try:
+            rv.add_first(_get_path_struct(match, template.count('\n', 0, pos) + 1))
+        except MergeException:
+            # leave the error to the engine
+            return None
+        pos = template.find('{{', match.end())
+    return rv.result
 
 
 def _ignore_constants(var):
@@ -46,15 +143,100 @@ def infer_from_node(node, config=Config()):
     return rv
 
 
-def infer(template, config=Config()):
+def infer(template, config=Config(), cache=infer_cache):
     """Returns a :class:`.model.Dictionary` which reflects a structure of the context required by ``template``.
 
+    Results are memoized in ``cache``; every call returns a fresh copy, so it is safe
+    to modify the returned structure.
+
     :param template: a template
     :type template: string
     :param config: a config
     :type config: :class:`.config.Config`
+    :param cache: a cache for results or ``None`` to disable caching
+    :type cache: :class:`.cache.LRUCache`
     :rtype: :class:`.model.Dictionary`
     :raises: :class:`.exceptions.MergeException`, :class:`.exceptions.InvalidExpression`,
              :class:`.exceptions.UnexpectedExpression`
     """
-    return infer_from_node(parse(template), config=config)
+    if isinstance(template, _compat.string_types):
+        rv = infer_simple(template)
+        if rv is not None:
+            infer_counts['simple' if rv.data else 'literal'] += 1
+            return rv
+    infer_counts['engine'] += 1
+    if cache is None or not isinstance(template, _compat.string_types):
+        return infer_from_node(parse(template), config=config)
+    key = (template, config.fingerprint())
+    rv = cache.get(key)
+    if rv is None:
+        rv = infer_from_node(parse(template), config=config)
+        cache.put(key, rv)
+    return rv.clone()
+
+
+def parse_expression(expression, jinja2_env=None, cache=parse_cache):
+    """Parses a Jinja2 expression, such as the condition of an ``{% if %}`` tag without the
+    tag, and returns it's NODE.
+
+    If ``jinja2_env`` is not passed, :data:`default_environment` is used and
+    the NODE is looked up in (and stored to) ``cache``.
+
+    :type expression: basestring
+    :type jinja2_env: :class:`jinja2.Environment`
+    :param cache: a cache for NODEs or ``None`` to disable caching
+    :type cache: :class:`.cache.LRUCache`
+    :rtype: :class:`jinja2.nodes.Expr`
+    :raises: :class:`jinja2.TemplateSyntaxError`
+    """
+    if jinja2_env is not None or cache is None:
+        return _parse_expression(expression, jinja2_env or default_environment)
+    key = ('expression', expression)
+    node = cache.get(key)
+    if node is None:
+        node = _parse_expression(expression, default_environment)
+        cache.put(key, node)
+    return node
+
+
+def _parse_expression(expression, jinja2_env):
+    parser = Parser(jinja2_env, expression, state='variable')
+    node = parser.parse_expression()
+    if not parser.stream.eos:
+        raise jinja2.TemplateSyntaxError('chunk after expression', parser.stream.current.lineno, None, None)
+    return node
+
+
+def infer_expression(expression, config=Config(), cache=expression_cache):
+    """Returns a :class:`.model.Dictionary` which reflects a structure of the context required
+    by ``expression``, the same as :func:`infer` returns for ``'{{ ' + expression + ' }}'``
+    but without the template and output NODEs around the expression.
+
+    :param expression: an expression, such as an Ansible ``when`` condition
+    :type expression: string
+    :param config: a config
+    :type config: :class:`.config.Config`
+    :param cache: a cache for results or ``None`` to disable caching
+    :type cache: :class:`.cache.LRUCache`
+    :rtype: :class:`.model.Dictionary`
+    """
+    match = _SIMPLE_PATH_RE.match(expression)
+    if match is not None and match.group(1) not in _RESERVED_NAMES:
+        return _get_path_struct(match, 1)
+    if cache is None:
+        return _infer_expression(expression, config)
+    key = (expression, config.fingerprint())
+    rv = cache.get(key)
+    if rv is None:
+        rv = _infer_expression(expression, config)
+        cache.put(key, rv)
+    return rv.clone()
+
+
+def _infer_expression(expression, config):
+    node = parse_expression(expression)
+    _, struct = visit_expr(node, Context(predicted_struct=Scalar.from_node(node)), {}, config)
+    # gives the top level the flags the template and output of infer would
+    rv = Accumulator()
+    rv.add_first(struct)
+    return _ignore_constants(rv.result)
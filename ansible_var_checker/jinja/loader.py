@@ -0,0 +1,96 @@
+from jinja2 import nodes, Environment, PackageLoader
+
+from .cache import LRUCache
+
+#: Nodes that make the structure of a template depend on something else than
+#: its source and the config: macros of the including template, other
+#: templates, or macros it registers for the including template.
+CONTEXT_DEPENDENT_NODES = (nodes.Call, nodes.Macro, nodes.CallBlock, nodes.Include,
+                           nodes.Extends, nodes.Import, nodes.FromImport)
+
+
+class TemplateLoader(object):
+    """Loads the templates used by ``{% include %}`` and ``{% extends %}`` through a single
+    :class:`jinja2.Environment` and keeps their parsed NODEs, and the structures inferred from
+    them, until the template changes on disk.
+
+    :param package_name: see :attr:`.config.Config.PACKAGE_NAME`
+    :param template_dir: see :attr:`.config.Config.TEMPLATE_DIR`
+    """
+    def __init__(self, package_name, template_dir):
+        self.environment = Environment(loader=PackageLoader(package_name, template_dir))
+        # name -> [template NODE, uptodate callable, {config fingerprint -> structure} or None]
+        self._templates = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get_entry(self, name):
+        entry = self._templates.get(name)
+        if entry is not None and (entry[1] is None or entry[1]()):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        source, _, uptodate = self.environment.loader.get_source(self.environment, name)
+        template = self.environment.parse(source)
+        cacheable = next(template.find_all(CONTEXT_DEPENDENT_NODES), None) is None
+        entry = [template, uptodate, {} if cacheable else None]
+        self._templates[name] = entry
+        return entry
+
+    def get_template(self, name):
+        """Returns the NODE of template ``name``. The NODE is shared and must not be modified.
+
+        :rtype: :class:`jinja2.nodes.Template`
+        """
+        return self._get_entry(name)[0]
+
+    def infer(self, name, macroses, config, visit_many):
+        """Returns the structure of the body of template ``name``.
+
+        Structures of templates without macros, calls, includes and imports are
+        computed once per config; a copy of the cached structure is returned.
+
+        :param visit_many: :func:`.visitors.util.visit_many`
+        :rtype: :class:`.model.Dictionary`
+        """
+        template, _, structures = self._get_entry(name)
+        if structures is None:
+            return visit_many(template.body, macroses, config)
+        key = config.fingerprint()
+        structure = structures.get(key)
+        if structure is None:
+            structure = structures[key] = visit_many(template.body, macroses, config)
+        return structure.clone()
+
+    def stats(self):
+        """Returns a :class:`dict` with the counters and the number of cached templates."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._templates),
+        }
+
+    def clear(self):
+        """Drops all cached templates and resets the counters."""
+        self._templates.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+loaders = LRUCache(maxsize=64)
+"""An :class:`.cache.LRUCache` of :class:`TemplateLoader` objects keyed on
+:attr:`.config.Config.PACKAGE_NAME` and :attr:`.config.Config.TEMPLATE_DIR`."""
+
+
+def get_loader(config):
+    """Returns the :class:`TemplateLoader` for the templates of ``config``.
+
+    :type config: :class:`.config.Config`
+    :rtype: :class:`TemplateLoader`
+    """
+    key = (config.PACKAGE_NAME, config.TEMPLATE_DIR)
+    loader = loaders.get(key)
+    if loader is None:
+        loader = TemplateLoader(config.PACKAGE_NAME, config.TEMPLATE_DIR)
+        loaders.put(key, loader)
+    return loader
@@ -1,7 +1,16 @@
+from jinja2 import nodes
+
 from . import _compat
+from .cache import LRUCache
 from .config import default_config
 from .mergers import merge
-from .model import Dictionary, Variable
+from .model import Dictionary, Scalar, Variable
+
+
+macro_summaries = LRUCache(maxsize=1024)
+"""An :class:`.cache.LRUCache` of :class:`MacroSummary` objects used by the ``{% macro %}``
+visitor. Keys are pairs of the macro NODE id and :meth:`.config.Config.fingerprint`.
+"""
 
 
 class Macro(object):
@@ -28,29 +37,103 @@ class Macro(object):
         self.kwargs = kwargs
 
 
+class MacroSummary(object):
+    """What visiting a macro definition yields: the :class:`Macro` and the structure
+    of its body without the arguments.
+
+    .. attribute:: called_names
+
+        Names of the functions called in the body. The summary depends on the macros
+        known at the time it was made only through these.
+
+    .. attribute:: cacheable
+
+        Is false if the body defines macros or includes or imports templates.
+    """
+    def __init__(self, macro, body_struct, called_names, cacheable):
+        self.macro = macro
+        self.body_struct = body_struct
+        self.called_names = called_names
+        self.cacheable = cacheable
+
+    @classmethod
+    def from_node(cls, node, macro, body_struct):
+        """
+        :param node: the macro NODE
+        :type node: :class:`jinja2.nodes.Macro`
+        """
+        called_names = frozenset(
+            call.node.name for call in node.find_all(nodes.Call) if isinstance(call.node, nodes.Name))
+        cacheable = next(node.find_all((nodes.Macro, nodes.CallBlock, nodes.Include, nodes.Extends,
+                                        nodes.Import, nodes.FromImport)), None) is None
+        return cls(macro, body_struct, called_names, cacheable)
+
+    def is_valid_for(self, macroses):
+        """Returns whether the summary holds when the body is visited with ``macroses``."""
+        if not self.cacheable:
+            return False
+        return not macroses or not any(name in macroses for name in self.called_names)
+
+    def clone(self):
+        macro = Macro(self.macro.name,
+                      [(name, struct.clone()) for name, struct in self.macro.args],
+                      [(name, struct.clone()) for name, struct in self.macro.kwargs])
+        return MacroSummary(macro, self.body_struct.clone(), self.called_names, self.cacheable)
+
+
+def get_static_rtype(node):
+    """Returns the type :func:`.visitors.expr.visit_expr` returns for ``node`` when it is
+    visited with a :class:`Variable` predicted, or ``None`` if it can not be told without
+    visiting the node.
+
+    Names, constants and attribute or constant item lookups on a name do not depend
+    on the predicted structure for their type.
+    """
+    while isinstance(node, (nodes.Getattr, nodes.Getitem)):
+        if isinstance(node, nodes.Getitem) and not (
+                isinstance(node.arg, nodes.Const) and
+                isinstance(node.arg.value, _compat.string_types + (int,))):
+            return None
+        node = node.node
+    if isinstance(node, nodes.Name):
+        return Variable.from_node(node)
+    if isinstance(node, nodes.Const):
+        return Scalar.from_node(node, constant=True)
+    return None
+
+
 class MacroCall(object):
+    """Matches the arguments passed to a macro with the ones it expects.
+
+    Every passed argument is visited once with a structure predicted from its
+    type and the expected one. The type of an argument comes from
+    :func:`get_static_rtype` or, if that can not tell, from an extra visit.
+    """
     def __init__(self, macro, passed_args, passed_kwargs, config=default_config):
         self.config = config
 
         self.passed_args = []
         for arg_node in passed_args:
-            arg_rtype, arg_struct = visit_expr(
-                arg_node, Context(predicted_struct=Variable.from_node(arg_node)), config=config)
-            self.passed_args.append((arg_node, arg_rtype))
+            self.passed_args.append((arg_node, self._get_rtype(arg_node, arg_node)))
 
         self.passed_kwargs = {}
         for kwarg_node in passed_kwargs:
-            kwarg_rtype, kwarg_struct = visit_expr(
-                kwarg_node.value, Context(predicted_struct=Variable.from_node(kwarg_node)), config=config)
-            self.passed_kwargs[kwarg_node.key] = (kwarg_node, kwarg_rtype)
+            self.passed_kwargs[kwarg_node.key] = (kwarg_node, self._get_rtype(kwarg_node.value, kwarg_node))
 
         self.expected_args = macro.args[:]
         self.expected_kwargs = macro.kwargs[:]
 
+    def _get_rtype(self, node, predicted_node):
+        rtype = get_static_rtype(node)
+        if rtype is None:
+            rtype, _ = visit_expr(node, Context(predicted_struct=Variable.from_node(predicted_node)),
+                                  config=self.config)
+        return rtype
+
     def _match_passed_args(self, to_args):
         rv = Dictionary()
         matched_args = list(zip(self.passed_args, to_args))
-        for i, ((arg_node, arg), (expected_arg_name, expected_arg)) in enumerate(matched_args, start=1):
+        for (arg_node, arg), (expected_arg_name, expected_arg) in matched_args:
             _, s = visit_expr(arg_node, Context(predicted_struct=merge(arg, expected_arg)), config=self.config)
             rv = merge(rv, s)
         del self.passed_args[:len(matched_args)]
@@ -65,15 +148,18 @@ class MacroCall(object):
 
     def _match_passed_kwargs(self, to_args):
         rv = Dictionary()
+        expected = dict((name, struct) for name, struct in to_args)
+        matched_names = set()
         for kwarg_name, (kwarg_node, kwarg_type) in list(_compat.iteritems(self.passed_kwargs)):
-            for (expected_arg_name, expected_arg_struct) in list(to_args):
-                if kwarg_name == expected_arg_name:
-                    _, s = visit_expr(kwarg_node.value,
-                                      Context(predicted_struct=merge(kwarg_type, expected_arg_struct)),
-                                      config=self.config)
-                    rv = merge(rv, s)
-                    to_args.remove((expected_arg_name, expected_arg_struct))
-                    del self.passed_kwargs[kwarg_name]
+            if kwarg_name in expected:
+                _, s = visit_expr(kwarg_node.value,
+                                  Context(predicted_struct=merge(kwarg_type, expected[kwarg_name])),
+                                  config=self.config)
+                rv = merge(rv, s)
+                matched_names.add(kwarg_name)
+                del self.passed_kwargs[kwarg_name]
+        if matched_names:
+            to_args[:] = [arg for arg in to_args if arg[0] not in matched_names]
         return rv
 
     def match_passed_kwargs_to_expected_args(self):
@@ -2,6 +2,7 @@ import itertools
 
 from .model import Scalar, Dictionary, List, Variable, Tuple
 from .exceptions import MergeException
+from . import _compat
 from ._compat import zip_longest
 
 
@@ -16,18 +17,23 @@ def merge(first, second, custom_merger=None):
     .. note::
 
         ``first`` must reflect expressions that occur in template **before** the expressions of ``second``.
+
+    .. note::
+
+        Nested variables that need no merging are not copied: the result shares them
+        with ``first`` and ``second``.
     """
     if isinstance(first, Scalar) and isinstance(second, Scalar):
-        result = first.clone()
+        result = first.copy()
     elif isinstance(first, Dictionary) and isinstance(second, Dictionary):
         result = Dictionary()
         for key in set(itertools.chain(first.iterkeys(), second.iterkeys())):
             if key in first and key in second:
                 result[key] = merge(first[key], second[key], custom_merger=custom_merger)
             elif key in first:
-                result[key] = first[key].clone()
+                result[key] = first[key]
             elif key in second:
-                result[key] = second[key].clone()
+                result[key] = second[key]
     elif isinstance(first, List) and isinstance(second, List):
         result = List(merge(first.items, second.items, custom_merger=custom_merger))
     elif isinstance(first, Tuple) and isinstance(second, Tuple):
@@ -59,7 +65,7 @@ def merge(first, second, custom_merger=None):
       # print('END')
       if instanceof_many(other_item, [List, Tuple, Dictionary]):
         raise MergeException(first, second)
-      result = scalar_item.clone()
+      result = scalar_item.copy()
       #print('result')
       #print(result)
       #print('END')
@@ -72,17 +78,17 @@ def merge(first, second, custom_merger=None):
       #print('END')
       if isinstance(other_item, Scalar):
         raise MergeException(first, second)
-      result = typed_item.clone()
+      result = typed_item.copy()
       #print('result')
       #print(result)
       #print('END')
     elif first.is_unknown() or second.is_unknown():
       known_item = second if first.is_unknown() else first
-      result = known_item.clone()
+      result = known_item.copy()
     else:
       raise MergeException(first, second)
     result.label = first.label or second.label
-    result.linenos = list(sorted(set(first.linenos + second.linenos)))
+    result.linenos = sorted(set(first.linenos + second.linenos))
     result.constant = first.constant
     result.may_be_defined = first.may_be_defined
     result.used_with_default = first.used_with_default and second.used_with_default
@@ -92,6 +98,108 @@ def merge(first, second, custom_merger=None):
         result = custom_merger(first, second, result)
     return result
 
+def is_compatible(first, second):
+    """Returns whether :func:`merge` can merge ``first`` and ``second``, that is, whether
+    ``merge(first, second)`` would not raise :class:`.exceptions.MergeException`.
+
+    Unlike calling :func:`merge`, it creates and changes no variables: it only walks
+    the parts of both structures that :func:`merge` would merge, and raises the
+    other exceptions :func:`merge` raises for them.
+
+    :type first: :class:`.model.Variable`
+    :type second: :class:`.model.Variable`
+    """
+    if isinstance(first, Scalar) and isinstance(second, Scalar):
+        return True
+    elif isinstance(first, Dictionary) and isinstance(second, Dictionary):
+        second_data = second.data
+        for key, value in _compat.iteritems(first.data):
+            if key in second_data and not is_compatible(value, second_data[key]):
+                return False
+        return True
+    elif isinstance(first, List) and isinstance(second, List):
+        return is_compatible(first.items, second.items)
+    elif isinstance(first, Tuple) and isinstance(second, Tuple):
+        if first.items is second.items is None:
+            return True
+        if len(first.items) != len(second.items) and not (first.may_be_extended or second.may_be_extended):
+            return False
+        for a, b in zip_longest(first.items, second.items):
+            # merge fills the shorter tuple with unknown variables, which merge with anything
+            if a is not None and b is not None and not is_compatible(a, b):
+                return False
+        return True
+    elif (isinstance(first, Tuple) or isinstance(second, Tuple)) and (isinstance(first, List) or isinstance(second, List)):
+        tuple_item = first if isinstance(first, Tuple) else second
+        list_item = first if isinstance(first, List) else second
+        tuple_items = tuple_item.items if tuple_item.items is not None else ()
+        # the same check as in merge, which raises TypeError as the item of a list has no length
+        return len(tuple_items) == len(list_item.items) or tuple_item.may_be_extended
+    elif isinstance(first, Scalar) or isinstance(second, Scalar):
+        other_item = first if not isinstance(first, Scalar) else second
+        return not instanceof_many(other_item, [List, Tuple, Dictionary])
+    elif instanceof_many(first, [List, Tuple, Dictionary]) or instanceof_many(second, [List, Tuple, Dictionary]):
+        return True
+    return first.is_unknown() or second.is_unknown()
+
+
+class Accumulator(object):
+    """Merges structures into a single :class:`.model.Dictionary` that it owns.
+
+    :meth:`add` does what ``rv = merge(rv, struct)`` does and :meth:`add_first` what
+    ``rv = merge(struct, rv)`` does, but in place: only the keys of ``struct`` are
+    written, instead of building a new dictionary with every accumulated key for
+    each structure. Nested variables are shared with the added structures, as with
+    :func:`merge`, and are never modified.
+
+    The keys of :attr:`result` are in the order they were first added.
+
+    :param initial: the first structure, it is copied and not modified
+    :type initial: :class:`.model.Dictionary`
+    """
+    def __init__(self, initial=None):
+        self.result = initial.copy() if initial is not None else Dictionary()
+
+    def add(self, struct):
+        """Merges ``struct`` as occurring after everything added before."""
+        result = self.result
+        if not isinstance(result, Dictionary) or not isinstance(struct, Dictionary):
+            self.result = merge(result, struct)
+            return
+        data = result.data
+        for key, value in _compat.iteritems(struct.data):
+            if key in data:
+                data[key] = merge(data[key], value)
+            else:
+                data[key] = value
+        result.label = result.label or struct.label
+        self._merge_flags(struct)
+
+    def add_first(self, struct):
+        """Merges ``struct`` as occurring before everything added before."""
+        result = self.result
+        if not isinstance(result, Dictionary) or not isinstance(struct, Dictionary):
+            self.result = merge(struct, result)
+            return
+        data = result.data
+        for key, value in _compat.iteritems(struct.data):
+            if key in data:
+                data[key] = merge(value, data[key])
+            else:
+                data[key] = value
+        result.label = struct.label or result.label
+        result.constant = struct.constant
+        result.may_be_defined = struct.may_be_defined
+        self._merge_flags(struct)
+
+    def _merge_flags(self, struct):
+        result = self.result
+        result.linenos = sorted(set(result.linenos + struct.linenos))
+        result.used_with_default = result.used_with_default and struct.used_with_default
+        result.checked_as_defined = result.checked_as_defined and struct.checked_as_defined
+        result.checked_as_undefined = result.checked_as_undefined and struct.checked_as_undefined
+
+
 def instanceof_many(obj, instances):
   for instance in instances:
     if isinstance(obj, instance):
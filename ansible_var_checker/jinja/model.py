@@ -10,7 +10,8 @@ class Variable(object):
 
     .. attribute:: linenos
 
-        An ordered list of line numbers on which the variable occurs.
+        An ordered tuple of line numbers on which the variable occurs. Assigned lists are
+        converted to tuples, so copies of the variable can share it.
 
     .. attribute:: label
 
@@ -43,24 +44,60 @@ class Variable(object):
         Is true if the variable occurs within ``{% if %}`` block which condition checks
         if the variable is defined.
 
-    .. attribute:: value
+    .. note::
 
-        Value of the variable in template. Set by default filter or assignment.
+        Variables have ``__slots__``, so only the attributes above can be set.
+
+    .. note::
+
+        Structures returned by :func:`.mergers.merge` share nested variables with the merged
+        structures. Before modifying a nested variable in place, replace it with its
+        :meth:`copy`, or :meth:`clone` the whole structure.
     """
+    __slots__ = ('label', '_linenos', 'constant', 'may_be_defined', 'used_with_default',
+                 'checked_as_undefined', 'checked_as_defined')
+
     def __init__(self, label=None, linenos=None, constant=False,
                  may_be_defined=False, used_with_default=False,
                  checked_as_undefined=False, checked_as_defined=False):
         self.label = label
-        self.linenos = linenos if linenos is not None else []
+        self.linenos = linenos
         self.constant = constant
         self.may_be_defined = may_be_defined
         self.used_with_default = used_with_default
         self.checked_as_undefined = checked_as_undefined
         self.checked_as_defined = checked_as_defined
 
+    @property
+    def linenos(self):
+        return self._linenos
+
+    @linenos.setter
+    def linenos(self, linenos):
+        self._linenos = tuple(linenos) if linenos is not None else ()
+
     def clone(self):
+        """Returns a deep copy of the variable. Variables without nested variables have
+        nothing to share, so this is the same as :meth:`copy`; :class:`Dictionary`,
+        :class:`List` and :class:`Tuple` also clone their nested variables.
+        """
+        return self.copy()
+
+    def copy(self):
+        """Returns a shallow copy of the variable. For :class:`Dictionary`, :class:`List`
+        and :class:`Tuple`, unlike :meth:`clone`, nested variables are not copied and are
+        shared with the original.
+        """
         cls = type(self)
-        return cls(**self.__dict__)
+        rv = cls.__new__(cls)
+        rv.label = self.label
+        rv._linenos = self._linenos
+        rv.constant = self.constant
+        rv.may_be_defined = self.may_be_defined
+        rv.used_with_default = self.used_with_default
+        rv.checked_as_undefined = self.checked_as_undefined
+        rv.checked_as_defined = self.checked_as_defined
+        return rv
 
     @classmethod
     def _get_kwargs_from_node(cls, node):
@@ -70,7 +107,7 @@ class Variable(object):
         }
 
     def _get_vals(self):
-      return str(self.linenos) + ', ' + str(self.label) + ', ' + str(self.constant) + ', ' + str(self.used_with_default) + ', ' + str(self.checked_as_undefined) + ', ' + str(self.checked_as_defined) + ', ' + str(self.required)
+      return str(list(self.linenos)) + ', ' + str(self.label) + ', ' + str(self.constant) + ', ' + str(self.used_with_default) + ', ' + str(self.checked_as_undefined) + ', ' + str(self.checked_as_defined) + ', ' + str(self.required)
 
     def is_unknown(Self):
       return True
@@ -127,6 +164,7 @@ class Dictionary(Variable):
     .. automethod:: iterkeys
     .. automethod:: pop
     """
+    __slots__ = ('data',)
 
     def __init__(self, data=None, **kwargs):
         self.data = data or {}
@@ -139,12 +177,17 @@ class Dictionary(Variable):
         return pprint.pformat(self.data) + ', ' + self._get_vals()
 
     def clone(self):
-        rv = super(Dictionary, self).clone()
+        rv = super(Dictionary, self).copy()
         rv.data = {}
         for k, v in _compat.iteritems(self.data):
             rv.data[k] = v.clone()
         return rv
 
+    def copy(self):
+        rv = super(Dictionary, self).copy()
+        rv.data = dict(self.data)
+        return rv
+
     def is_unknown(Self):
       return False
 
@@ -194,6 +237,8 @@ class List(Variable):
 
         A structure of list items, subclass of :class:`Variable`.
     """
+    __slots__ = ('items',)
+
     def __init__(self, items, **kwargs):
         self.items = items
         super(List, self).__init__(**kwargs)
@@ -205,10 +250,15 @@ class List(Variable):
         return pprint.pformat([self.items]) + ', ' + self._get_vals()
 
     def clone(self):
-        rv = super(List, self).clone()
+        rv = super(List, self).copy()
         rv.items = self.items.clone()
         return rv
 
+    def copy(self):
+        rv = super(List, self).copy()
+        rv.items = self.items
+        return rv
+
     def is_unknown(Self):
       return False
 
@@ -229,6 +279,8 @@ class Tuple(Variable):
 
         Whether new elements can be added to the tuple in the process of merge or not.
     """
+    __slots__ = ('items', 'may_be_extended')
+
     def __init__(self, items, **kwargs):
         self.items = tuple(items) if items is not None else ()
         self.may_be_extended = kwargs.pop('may_be_extended', False)
@@ -241,8 +293,15 @@ class Tuple(Variable):
         return pprint.pformat(self.items) + ', ' + self._get_vals()
 
     def clone(self):
-        rv = super(Tuple, self).clone()
+        rv = super(Tuple, self).copy()
         rv.items = self.items and tuple(s.clone() for s in self.items)
+        rv.may_be_extended = self.may_be_extended
+        return rv
+
+    def copy(self):
+        rv = super(Tuple, self).copy()
+        rv.items = self.items
+        rv.may_be_extended = self.may_be_extended
         return rv
 
     def is_unknown(Self):
@@ -256,6 +315,8 @@ class Tuple(Variable):
 
 class Scalar(Variable):
     """A scalar. Either string, number, boolean or ``None``."""
+    __slots__ = ()
+
     def __repr__(self):
         return '<scalar>, ' + self._get_vals()
 
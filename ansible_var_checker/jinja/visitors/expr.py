@@ -1,13 +1,12 @@
 import functools
-from inspect import getargspec, ismethod
 from jinja2 import nodes
 
 from ..model import Scalar, Dictionary, List, Tuple, Variable
-from ..mergers import merge_rtypes, merge, merge_many, merge_bool_expr_structs
-from ..exceptions import InvalidExpression, UnexpectedExpression, MergeException
+from ..mergers import Accumulator, is_compatible, merge_rtypes, merge, merge_many, merge_bool_expr_structs
+from ..exceptions import InvalidExpression, UnexpectedExpression
 from ..config import default_config
 from .. import _compat
-from .util import visit_many
+from .util import find_visitor, visit_many
 
 
 class Context(object):
@@ -104,25 +103,31 @@ class Context(object):
         return rv
 
     def meet(self, actual_struct, actual_node):
-        try:
-            merge(self.predicted_struct, actual_struct)
-        except MergeException:
+        if not is_compatible(self.predicted_struct, actual_struct):
             raise UnexpectedExpression(
                 self.predicted_struct, actual_node, actual_struct)
-        else:
-            return True
+        return True
 
 
 expr_visitors = {}
 
+# concrete node class -> visitor, filled in by :func:`visit_expr`
+_expr_dispatch = {}
+
 
 def visits_expr(node_cls):
     """Decorator that registers a function as a visitor for ``node_cls``.
 
+    Unless Python runs with ``-O``, the returned function asserts the type of
+    the node it is called with.
+
     :param node_cls: subclass of :class:`jinja2.nodes.Expr`
     """
     def decorator(func):
         expr_visitors[node_cls] = func
+        _expr_dispatch.clear()
+        if not __debug__:
+            return func
         @functools.wraps(func)
         def wrapped_func(node, ctx, macroses=None, config=default_config):
             assert isinstance(node, node_cls)
@@ -139,11 +144,10 @@ def visit_expr(node, ctx, macroses=None, config=default_config):
     :returns: a tuple where the first element is an expression type (instance of :class:`Variable`)
               and the second element is an expression structure (instance of :class:`.model.Dictionary`)
     """
-    visitor = expr_visitors.get(type(node))
-    if not visitor:
-        for node_cls, visitor_ in _compat.iteritems(expr_visitors):
-            if isinstance(node, node_cls):
-                visitor = visitor_
+    node_cls = type(node)
+    visitor = _expr_dispatch.get(node_cls)
+    if visitor is None:
+        visitor = _expr_dispatch[node_cls] = find_visitor(expr_visitors, node_cls)
     if not visitor:
         raise Exception(
             'expression visitor for {0} is not found'.format(type(node)))
@@ -159,21 +163,21 @@ def _visit_dict(node, ctx, macroses, items, config=default_config):
     ctx.meet(Dictionary(), node)
     rtype = Dictionary.from_node(
         node, constant=True)
-    struct = Dictionary()
+    struct = Accumulator()
     for key, value in items:
         value_rtype, value_struct = visit_expr(value, Context(
             predicted_struct=Variable.from_node(value)), macroses, config=config)
-        struct = merge(struct, value_struct)
+        struct.add(value_struct)
         if isinstance(key, nodes.Node):
             key_rtype, key_struct = visit_expr(key, Context(
                 predicted_struct=Scalar.from_node(key)), macroses,
                 config=config)
-            struct = merge(struct, key_struct)
+            struct.add(key_struct)
             if isinstance(key, nodes.Const):
                 rtype[key.value] = value_rtype
         elif isinstance(key, _compat.string_types):
             rtype[key] = value_rtype
-    return rtype, struct
+    return rtype, struct.result
 
 
 @visits_expr(nodes.BinExpr)
@@ -219,19 +223,50 @@ def visit_name(node, ctx, macroses=None, config=default_config):
     })
 
 
+def _is_key_lookup(node):
+    return isinstance(node, nodes.Getitem) and isinstance(node.arg, nodes.Const) and \
+        isinstance(node.arg.value, _compat.string_types)
+
+
+def _visit_path(node, ctx, macroses, config):
+    """Visits a chain of attribute and constant key lookups, such as ``a.b['c'].d``.
+
+    The structure predicted for the object the chain starts from is built once, from
+    the innermost lookup outwards, instead of wrapping and cloning a copy of it for
+    every lookup.
+    """
+    path = []
+    key_lookup = False
+    while True:
+        if isinstance(node, nodes.Getattr):
+            path.append((node, node.attr))
+        elif _is_key_lookup(node):
+            path.append((node, node.arg.value))
+            key_lookup = True
+        else:
+            break
+        node = node.node
+    predicted_struct = ctx.get_predicted_struct()
+    for lookup_node, key in path:
+        if key:
+            predicted_struct.label = key
+        predicted_struct = Dictionary.from_node(lookup_node, {key: predicted_struct})
+    rtype, struct = visit_expr(node, Context(ctx=ctx, predicted_struct=predicted_struct), macroses, config=config)
+    if key_lookup:
+        # a key lookup merges the structure of the key, which is empty for a constant
+        struct = merge(struct, Dictionary())
+    return rtype, struct
+
+
 @visits_expr(nodes.Getattr)
 def visit_getattr(node, ctx, macroses=None, config=default_config):
-    ctx = Context(
-        ctx=ctx,
-        predicted_struct=Dictionary.from_node(node, {
-            node.attr: ctx.get_predicted_struct(label=node.attr),
-        }))
-    test1, test2 = visit_expr(node.node, ctx, macroses, config=config)
-    return test1, test2
+    return _visit_path(node, ctx, macroses, config)
 
 
 @visits_expr(nodes.Getitem)
 def visit_getitem(node, ctx, macroses=None, config=default_config):
+    if _is_key_lookup(node):
+        return _visit_path(node, ctx, macroses, config)
     arg = node.arg
     if isinstance(arg, nodes.Const):
         if isinstance(arg.value, int):
@@ -246,10 +281,6 @@ def visit_getitem(node, ctx, macroses=None, config=default_config):
             #     items = [Variable() for i in range(arg.value + 1)]
             #     items[arg.value] = ctx.get_predicted_struct()
             #     predicted_struct = Tuple.from_node(node, tuple(items), may_be_extended=True)
-        elif isinstance(arg.value, _compat.string_types):
-            predicted_struct = Dictionary.from_node(node, {
-                arg.value: ctx.get_predicted_struct(label=arg.value),
-            })
         else:
             raise InvalidExpression(arg, '{0} is not supported as an index for a list or'
                                          ' a key for a dictionary'.format(arg.value))
@@ -333,6 +364,8 @@ def visit_cond_expr(node, ctx, macroses=None, config=default_config):
                 lookup_struct = if_struct
             elif var_struct.checked_as_defined:
                 lookup_struct = else_struct
+            # the merged struct may share the variable with test_struct
+            struct[var_name] = struct[var_name].copy()
             struct[var_name].may_be_defined = (lookup_struct and
                                                var_name in lookup_struct and
                                                lookup_struct[var_name].constant)
@@ -551,64 +584,46 @@ def visit_filter(node, ctx, macroses=None, config=default_config):
     elif node.name == 'attr':
         raise InvalidExpression(node, 'attr filter is not supported')
     else:
-        has_filter = False
-        for filter_obj in config.CUSTOM_FILTERS:
-            if hasattr(filter_obj, 'filters') and ismethod(getattr(filter_obj, 'filters')):
-              filters_to_search = filter_obj.filters()
+        signature = config.get_filter(node.name)
+        if signature is not None:
+            name = signature.name
+            max_arg_count = signature.max_arg_count
+            min_arg_count = signature.min_arg_count
+            if max_arg_count < 0 and config.RAISE_ON_INVALID_FILTER_ARGS:
+                raise InvalidExpression(
+                    node, 'Filter ' + name + ' needs at lenode 1 argument')
+            if max_arg_count == 0:
+                if node.args is not None and len(node.args) > 0 and config.RAISE_ON_INVALID_FILTER_ARGS:
+                    raise InvalidExpression(
+                        node, 'Filter ' + name + ' doesn\'t accept parameters')
+                node_struct = Variable.from_node(node.node)
+                return_struct_cls = Variable
             else:
-              filters_to_search = filter_obj
-            for name, func in filters_to_search.items():
-                if name == node.name:
-                    has_filter = True
-                    argspec = getargspec(func)
-                    args = argspec.args
-                    default_args = argspec.args[-len(argspec.defaults):] if argspec.defaults is not None else []
-                    if 'self' in args and 'self' not in default_args:
-                      args.remove('self')
-                    max_arg_count = len(args) - 1
-                    min_arg_count = max_arg_count - len(default_args)
-                    if argspec.varargs is not None:
-                      max_arg_count += 1
-                      min_arg_count += 1
-                    if argspec.keywords is not None:
-                      max_arg_count += 1
-                      min_arg_count += 1
-                    if max_arg_count < 0 and config.RAISE_ON_INVALID_FILTER_ARGS:
-                        raise InvalidExpression(
-                            node, 'Filter ' + name + ' needs at lenode 1 argument')
-                    if max_arg_count == 0:
-                        if node.args is not None and len(node.args) > 0 and config.RAISE_ON_INVALID_FILTER_ARGS:
-                            raise InvalidExpression(
-                                node, 'Filter ' + name + ' doesn\'t accept parameters')
-                        node_struct = Variable.from_node(node.node)
-                        return_struct_cls = Variable
-                    else:
-                        args_provided = 0 if node.args is None else len(node.args)
-                        if (args_provided < min_arg_count or args_provided > max_arg_count) and config.RAISE_ON_INVALID_FILTER_ARGS:
-                            needs_val = str(min_arg_count)
-                            if min_arg_count != max_arg_count:
-                              needs_val = str(min_arg_count) + '-' + str(max_arg_count)
-                            raise InvalidExpression(node, 'Filter ' + name + ' doesn\'t have the correct amount of params, has: ' + str(
-                                len(node.args)) + ', needs: ' + needs_val)
-                        node_struct = Variable.from_node(node.node)
-                        rtype, struct = visit_expr(node.node, Context(
-                            return_struct_cls=Variable,
-                            predicted_struct=node_struct
-                        ), macroses, config=config)
-                        predicted_struct = merge(
-                            Variable(), ctx.get_predicted_struct())
-                        for arg in node.args:
-                            item_rtype, item_struct = visit_expr(arg, Context(
-                                predicted_struct=predicted_struct), macroses, config=config)
-                            struct = merge(struct, item_struct)
-                        for kwarg in node.kwargs:
-                            item_rtype, item_struct = visit_expr(kwarg.value, Context(
-                                predicted_struct=predicted_struct), macroses, config=config)
-                            struct = merge(struct, item_struct)
-                        rtype = Variable.from_node(node)
-                        return rtype, struct
-                    break
-        if not has_filter:
+                args_provided = 0 if node.args is None else len(node.args)
+                if (args_provided < min_arg_count or args_provided > max_arg_count) and config.RAISE_ON_INVALID_FILTER_ARGS:
+                    needs_val = str(min_arg_count)
+                    if min_arg_count != max_arg_count:
+                      needs_val = str(min_arg_count) + '-' + str(max_arg_count)
+                    raise InvalidExpression(node, 'Filter ' + name + ' doesn\'t have the correct amount of params, has: ' + str(
+                        len(node.args)) + ', needs: ' + needs_val)
+                node_struct = Variable.from_node(node.node)
+                rtype, struct = visit_expr(node.node, Context(
+                    return_struct_cls=Variable,
+                    predicted_struct=node_struct
+                ), macroses, config=config)
+                predicted_struct = merge(
+                    Variable(), ctx.get_predicted_struct())
+                for arg in node.args:
+                    item_rtype, item_struct = visit_expr(arg, Context(
+                        predicted_struct=predicted_struct), macroses, config=config)
+                    struct = merge(struct, item_struct)
+                for kwarg in node.kwargs:
+                    item_rtype, item_struct = visit_expr(kwarg.value, Context(
+                        predicted_struct=predicted_struct), macroses, config=config)
+                    struct = merge(struct, item_struct)
+                rtype = Variable.from_node(node)
+                return rtype, struct
+        else:
             if config.RAISE_ON_NO_FILTER:
                 raise InvalidExpression(node, 'unknown filter')
             node_struct = Variable.from_node(node.node)
@@ -656,34 +671,34 @@ def visit_const(node, ctx, macroses=None, config=default_config):
 def visit_tuple(node, ctx, macroses=None, config=default_config):
     ctx.meet(Tuple(None), node)
 
-    struct = Dictionary()
+    struct = Accumulator()
     item_structs = []
     for item in node.items:
         item_rtype, item_struct = visit_expr(
             item, ctx, macroses, config=config)
         item_structs.append(item_rtype)
-        struct = merge(struct, item_struct)
+        struct.add(item_struct)
     rtype = Tuple.from_node(node, item_structs, constant=True)
-    return rtype, struct
+    return rtype, struct.result
 
 
 @visits_expr(nodes.List)
 def visit_list(node, ctx, macroses=None, config=default_config):
     ctx.meet(List(Variable()), node)
-    struct = Dictionary()
+    struct = Accumulator()
 
     predicted_struct = merge(List(Variable()), ctx.get_predicted_struct()).items
     el_rtype = None
     for item in node.items:
         item_rtype, item_struct = visit_expr(item, Context(
             predicted_struct=predicted_struct), macroses, config=config)
-        struct = merge(struct, item_struct)
+        struct.add(item_struct)
         if el_rtype is None:
             el_rtype = item_rtype
         else:
             el_rtype = merge_rtypes(el_rtype, item_rtype)
     rtype = List.from_node(node, el_rtype or Variable(), constant=True)
-    return rtype, struct
+    return rtype, struct.result
 
 
 @visits_expr(nodes.Dict)
@@ -1,27 +1,37 @@
 import functools
 
-from jinja2 import nodes, Environment, PackageLoader
+from jinja2 import nodes
 from jinja.config import default_config
 
 from ..model import Scalar, Dictionary, List, Variable, Tuple
-from ..macro import Macro
-from ..mergers import merge, merge_many
+from ..loader import get_loader
+from ..macro import Macro, MacroSummary, macro_summaries
+from ..mergers import Accumulator, merge, merge_many
 from ..exceptions import InvalidExpression
 from .._compat import iteritems, izip, zip_longest
 from .expr import Context, visit_expr
-from .util import visit_many
+from .util import find_visitor, visit_many
 
 
 stmt_visitors = {}
 
+# concrete node class -> visitor, filled in by :func:`visit_stmt`
+_stmt_dispatch = {}
+
 
 def visits_stmt(node_cls):
     """Decorator that registers a function as a visitor for ``node_cls``.
 
+    Unless Python runs with ``-O``, the returned function asserts the type of
+    the node it is called with.
+
     :param node_cls: subclass of :class:`jinja2.nodes.Stmt`
     """
     def decorator(func):
         stmt_visitors[node_cls] = func
+        _stmt_dispatch.clear()
+        if not __debug__:
+            return func
         @functools.wraps(func)
         def wrapped_func(node, macroses=None, config=default_config, child_blocks=None):
             assert isinstance(node, node_cls)
@@ -36,11 +46,10 @@ def visit_stmt(node, macroses=None, config=default_config, child_blocks=None):
     :param node: instance of :class:`jinja2.nodes.Stmt`
     :returns: :class:`.model.Dictionary`
     """
-    visitor = stmt_visitors.get(type(node))
-    if not visitor:
-        for node_cls, visitor_ in iteritems(stmt_visitors):
-            if isinstance(node, node_cls):
-                visitor = visitor_
+    node_cls = type(node)
+    visitor = _stmt_dispatch.get(node_cls)
+    if visitor is None:
+        visitor = _stmt_dispatch[node_cls] = find_visitor(stmt_visitors, node_cls)
     if not visitor:
         raise Exception('stmt visitor for {0} is not found'.format(type(node)))
     return visitor(node, macroses, config)
@@ -73,7 +82,10 @@ def visit_for(node, macroses=None, config=default_config, child_blocks=None):
 
     merge(iter_rtype, List(target_struct))
 
-    return merge_many(iter_struct, body_struct, else_struct)
+    rv = Accumulator(iter_struct)
+    rv.add(body_struct)
+    rv.add(else_struct)
+    return rv.result
 
 
 @visits_stmt(nodes.If)
@@ -86,7 +98,10 @@ def visit_if(node, macroses=None, config=default_config, child_blocks=None):
             node.test, Context(predicted_struct=test_predicted_struct), macroses, config)
     if_struct = visit_many(node.body, macroses, config, predicted_struct_cls=Scalar)
     else_struct = visit_many(node.else_, macroses, config, predicted_struct_cls=Scalar) if node.else_ else Dictionary()
-    struct = merge_many(test_struct, if_struct, else_struct)
+    rv = Accumulator(test_struct)
+    rv.add(if_struct)
+    rv.add(else_struct)
+    struct = rv.result
 
     for var_name, var_struct in iteritems(test_struct):
         if var_struct.checked_as_defined or var_struct.checked_as_undefined:
@@ -94,6 +109,8 @@ def visit_if(node, macroses=None, config=default_config, child_blocks=None):
                 lookup_struct = if_struct
             elif var_struct.checked_as_defined:
                 lookup_struct = else_struct
+            # the merged struct may share the variable with test_struct
+            struct[var_name] = struct[var_name].copy()
             struct[var_name].may_be_defined = (lookup_struct and
                                                var_name in lookup_struct and
                                                lookup_struct[var_name].constant)
@@ -149,6 +166,21 @@ def visit_output(node, macroses=None, config=default_config, child_blocks=None):
 
 @visits_stmt(nodes.Macro)
 def visit_macro(node, macroses=None, config=default_config, child_blocks=None):
+    key = (id(node), config.fingerprint())
+    # entries keep the NODE alive, so that it's id is not reused
+    cached = macro_summaries.get(key)
+    if cached is not None and cached[1].is_valid_for(macroses):
+        summary = cached[1].clone()
+    else:
+        summary = summarize_macro(node, macroses, config)
+        if summary.is_valid_for(macroses):
+            macro_summaries.put(key, (node, summary))
+            summary = summary.clone()
+    macroses[node.name] = summary.macro
+    return summary.body_struct
+
+
+def summarize_macro(node, macroses, config):
     # XXX the code needs to be refactored
     args = []
     kwargs = []
@@ -171,7 +203,6 @@ def visit_macro(node, macroses=None, config=default_config, child_blocks=None):
             kwargs.append((arg.name, default_rtype))
         else:
             args.append((arg.name, default_rtype))
-    macroses[node.name] = Macro(node.name, args, kwargs)
 
     tmp = dict(args)
     tmp.update(dict(kwargs))
@@ -181,7 +212,7 @@ def visit_macro(node, macroses=None, config=default_config, child_blocks=None):
 
     for arg in args_struct.iterkeys():
         body_struct.pop(arg, None)
-    return body_struct
+    return MacroSummary.from_node(node, Macro(node.name, args, kwargs), body_struct)
 
 
 @visits_stmt(nodes.Block)
@@ -191,8 +222,7 @@ def visit_block(node, macroses=None, config=default_config):
 
 @visits_stmt(nodes.Include)
 def visit_include(node, macroses=None, config=default_config, child_blocks=None):
-    template = get_inherited_template(config, node)
-    return visit_many(template.body, macroses, config)
+    return get_loader(config).infer(node.template.value, macroses, config, visit_many)
 
 
 @visits_stmt(nodes.Extends)
@@ -204,8 +234,7 @@ def visit_extends(node, macroses=None, config=default_config, child_blocks=None)
 
 
 def get_inherited_template(config, node):
-    env = Environment(loader=PackageLoader(config.PACKAGE_NAME, config.TEMPLATE_DIR))
-    return env.parse(env.loader.get_source(env, node.template.value)[0])
+    return get_loader(config).get_template(node.template.value)
 
 
 def separate_template_blocks(template, blocks, template_nodes):
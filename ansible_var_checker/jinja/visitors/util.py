@@ -1,7 +1,7 @@
 import jinja2.nodes
 
-from ..mergers import merge
-from ..model import Dictionary, Scalar, Variable
+from ..mergers import Accumulator
+from ..model import Variable
 
 
 def visit(node, macroses, config, predicted_struct_cls=Variable, return_struct_cls=Variable):
@@ -16,6 +16,18 @@ def visit(node, macroses, config, predicted_struct_cls=Variable, return_struct_c
     return structure
 
 
+def find_visitor(visitors, node_cls):
+    """Returns a visitor registered for ``node_cls`` or for the closest of it's base classes.
+
+    :param visitors: a :class:`dict` that maps node classes to visitors
+    """
+    for cls in node_cls.__mro__:
+        visitor = visitors.get(cls)
+        if visitor is not None:
+            return visitor
+    return None
+
+
 def visit_many(nodes, macroses, config, predicted_struct_cls=Variable, return_struct_cls=Variable):
     """Visits ``nodes`` and merges results.
 
@@ -24,14 +36,14 @@ def visit_many(nodes, macroses, config, predicted_struct_cls=Variable, return_st
                                    using this class by calling :meth:`from_node` method
     :return: :class:`Dictionary`
     """
-    rv = Dictionary()
+    rv = Accumulator()
     for node in nodes:
         if isinstance(node, jinja2.nodes.Extends):
             structure = visit_extends(node, macroses, config, [x for x in nodes if isinstance(x, jinja2.nodes.Block)])
         else:
             structure = visit(node, macroses, config, predicted_struct_cls, return_struct_cls)
-        rv = merge(structure, rv)
-    return rv
+        rv.add_first(structure)
+    return rv.result
 
 
 # keep these at the end of file to avoid circular imports
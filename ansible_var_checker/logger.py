@@ -63,3 +63,24 @@ class IndentedLoggerAdapter(logging.LoggerAdapter):
   def process(self, msg, kwargs):
     msg = indent(msg, self.indent, ch=self.char * self.num_per_indent)
     return msg, kwargs
+
+class LoggerStream(object):
+  """File object logging every line written to it with adapter, so output
+  written piece by piece still goes through the log handlers"""
+
+  def __init__(self, adapter, level=logging.DEBUG):
+    super(LoggerStream, self).__init__()
+    self.adapter = adapter
+    self.level = level
+    self.buffer = ''
+
+  def write(self, text):
+    lines = (self.buffer + text).split('\n')
+    self.buffer = lines.pop()
+    for line in lines:
+      self.adapter.log(self.level, line)
+
+  def flush(self):
+    if len(self.buffer) > 0:
+      self.adapter.log(self.level, self.buffer)
+      self.buffer = ''
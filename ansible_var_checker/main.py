@@ -1,21 +1,21 @@
 import argparse
+import sys
 from info import __version__
 from file_handler import FileHandler
-import ansible
-from jinja import Config
-from parser import PlaybookParser
-from yaml_constructor import YamlConstructor
-import ansible.plugins.filter.core
-import ansible.plugins.filter.mathstuff
-import ansible.plugins.filter.urls
-import ansible.plugins.filter.urlsplit
-from logger import IndentedLoggerAdapter
+from analysis import analyze_file, analyze_files, init_worker, get_session
+from jinja import expression_cache, infer_cache, infer_counts
+from report_writer import NdjsonWriter, YamlWriter
+from result_cache import DEFAULT_CACHE_DIR
+from summary import PlaybookSummary
+from watcher import Watcher
+from logger import IndentedLoggerAdapter, LoggerStream
 import logging
 
-logging.basicConfig(format='%(message)s', level=logging.DEBUG)
+logging.basicConfig(format='%(message)s', level=logging.DEBUG, stream=sys.stderr)
 
 logger = logging.getLogger(__name__)
 adapter = IndentedLoggerAdapter(logger)
+adapter_stream = LoggerStream(adapter)
 title_adapter = IndentedLoggerAdapter(logger, char='-')
 
 parser = argparse.ArgumentParser(description='Process ansible files to get variable information')
@@ -24,50 +24,120 @@ parser.add_argument('items', metavar='item', type=str, nargs='+', help='File(s)
 parser.add_argument('-v', '--verbosity', action='count', default=0, help='Verbosity of output')
 parser.add_argument('--version', action='version', version='v' + __version__)
 parser.add_argument('-b', '--basedir', help='basedir to construct the paths for files / dirs from')
+parser.add_argument('--infer-cache-size', type=int, default=infer_cache.maxsize, help='Number of inferred jinja strings to keep in memory (0 disables the cache)')
+parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of worker processes to analyze files with (0 uses one per CPU)')
+parser.add_argument('-c', '--cache', action='store_true', default=False, help='Reuse results of playbooks whose files did not change since the last run')
+parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Directory to store cached results in (default: ' + DEFAULT_CACHE_DIR + ')')
+parser.add_argument('-w', '--watch', action='store_true', default=False, help='Keep running and analyze playbooks again when their files change (in this process, --jobs is ignored)')
+parser.add_argument('--interval', type=float, default=1.0, help='Seconds between checks for changed files in watch mode (default: 1)')
+parser.add_argument('--history-size', type=int, default=None, help='Number of most recent accesses listed per variable with --list-history (default: all)')
+parser.add_argument('--format', choices=['text', 'ndjson'], default='text', help='Output format: indented text or one JSON record per line, written as soon as a playbook is analyzed (default: text)')
 type_group = parser.add_mutually_exclusive_group()
 type_group.add_argument('-d', '--dir', action='store_true', default=False, help='Indicate the input(s) are directories')
 type_group.add_argument('-f', '--file', action='store_true', default=False, help='Indicate the input(s) are files')
 type_group.add_argument('-l', '--list-history', action='store_true', default=False, help='List history entry in output')
 type_group.add_argument('-m', '--magic', action='store_true', default=False, help='Include magic variables that aren\'t used in output')
 
-args = parser.parse_args()
+def write_yaml(paths):
+  # logged line by line as the scope is walked instead of as one message
+  YamlWriter(adapter_stream).write_paths(paths)
+  adapter_stream.flush()
+  adapter.debug('')
 
-file_handler = FileHandler(*args.items, **vars(args))
-
-filters = [
-  ansible.plugins.filter.core.FilterModule(),
-  ansible.plugins.filter.mathstuff.FilterModule(),
-  ansible.plugins.filter.urls.FilterModule(),
-  ansible.plugins.filter.urlsplit.FilterModule()
-]
-config = Config(CUSTOM_FILTERS=filters)
-
-yaml_constructor = YamlConstructor()
-
-for filename in file_handler.get_valid_files():
-  parser = PlaybookParser(filename, basedir=file_handler.basedir, jinja_config=config)
-  parser.process()
-  title_adapter.info('FILENAME = ' + filename)
+def print_summary(summary):
+  title_adapter.info('FILENAME = ' + summary.filename)
   title_adapter.add()
   adapter.add()
-  for key in parser.scopes.keys():
-    title_adapter.debug ('SCOPE - ' + key)
+  for scope in summary.scopes:
+    title_adapter.debug ('SCOPE - ' + scope['name'])
     title_adapter.add()
     adapter.add()
     title_adapter.debug ('UNDEFINED:')
-    adapter.debug (yaml_constructor.to_string(parser.scopes[key].get_undefined(with_history=args.list_history)))
+    write_yaml(PlaybookSummary.iter_undefined(scope))
     title_adapter.debug ('ALL:')
-    adapter.debug (yaml_constructor.to_string(parser.scopes[key].get_all(with_history=args.list_history)))
+    write_yaml(PlaybookSummary.iter_all(scope))
     title_adapter.sub()
     adapter.sub()
-  if parser.has_errors():
+  if summary.has_errors():
     title_adapter.debug('--- NORMAL ERRORS ---')
-    for error in parser.errors:
-      adapter.debug(str(error))
-  if parser.has_jinja_errors():
+    for error in summary.errors:
+      adapter.debug(PlaybookSummary.format_error(error))
+  if summary.has_jinja_errors():
     title_adapter.debug('--- JINJA ERRORS ---')
-    for error in parser.jinja_errors:
-      adapter.debug(str(error))
+    for error in summary.jinja_errors:
+      adapter.debug(PlaybookSummary.format_error(error))
+
+def write_summary_records(summary, writer):
+  for record in summary.iter_records():
+    writer.write(record)
+
+def main():
+  args = parser.parse_args()
+
+  file_handler = FileHandler(*args.items, **vars(args))
+
+  cache_dir = args.cache_dir if args.cache else None
+
+  if args.format == 'ndjson':
+    writer = NdjsonWriter(sys.stdout)
+    report = lambda summary: write_summary_records(summary, writer)
+  else:
+    report = print_summary
+
+  if args.watch:
+    init_worker(args.infer_cache_size)
+
+    def analyze(filename):
+      return analyze_file(filename, basedir=file_handler.basedir, with_history=args.list_history, cache_dir=cache_dir, history_size=args.history_size, lazy=True)
+
+    def on_error(filename, error):
+      if args.format == 'ndjson':
+        writer.write({'type': 'error', 'playbook': filename, 'kind': 'analysis', 'scope': None, 'message': str(error)})
+        return
+      title_adapter.info('FILENAME = ' + filename)
+      adapter.info('Failed to analyze: ' + str(error))
+
+    def on_removed(filename):
+      if args.format == 'ndjson':
+        writer.write({'type': 'removed', 'playbook': filename})
+        return
+      title_adapter.info('REMOVED = ' + filename)
+
+    watcher = Watcher(file_handler, analyze, report, on_error=on_error, on_removed=on_removed, interval=args.interval)
+    watcher.watch()
+    return
+
+  summaries = analyze_files(
+    file_handler.get_valid_files(),
+    basedir=file_handler.basedir,
+    with_history=args.list_history,
+    jobs=args.jobs,
+    infer_cache_size=args.infer_cache_size,
+    cache_dir=cache_dir,
+    history_size=args.history_size,
+    lazy=True
+  )
+  for summary in summaries:
+    report(summary)
+
+  # with several jobs the cache is filled in the worker processes
+  if args.verbosity > 0 and args.jobs == 1:
+    session = get_session(file_handler.basedir)
+    if args.format == 'ndjson':
+      writer.write(dict(infer_cache.stats(), type='infer_cache'))
+      writer.write(dict(expression_cache.stats(), type='expression_cache'))
+      writer.write(dict(session.stats(), type='session'))
+      writer.write(dict(infer_counts, type='infer_counts'))
+      return
+    title_adapter.info('INFER CACHE = ' + ', '.join(key + ': ' + str(value) for key, value in sorted(infer_cache.stats().items())))
+    title_adapter.info('EXPRESSION CACHE = ' + ', '.join(key + ': ' + str(value) for key, value in sorted(expression_cache.stats().items())))
+    title_adapter.info('FILE CACHE = ' + ', '.join(key + ': ' + str(value) for key, value in sorted(session.stats().items())))
+    total = sum(infer_counts.values())
+    bypassed = (infer_counts['literal'] + infer_counts['simple']) * 100.0 / total if total else 0.0
+    title_adapter.info('INFER PATHS = ' + ', '.join(key + ': ' + str(value) for key, value in sorted(infer_counts.items())) + ', bypassed: ' + '%.1f%%' % bypassed)
+
+if __name__ == '__main__':
+  main()
 
 # print(file_handler._file)
 # print(file_handler._dir)
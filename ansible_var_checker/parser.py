@@ -1,8 +1,8 @@
-from scope import ErrorRecord, Scope
-from ansible.parsing.dataloader import DataLoader
+import os
+from scope import ErrorRecord, RecordingScope, Scope
+from role_cache import RoleSummary, freeze
+from session import AnalysisSession
 from ansible.playbook import Playbook
-from ansible.inventory.manager import InventoryManager
-from ansible.vars.manager import VariableManager
 from ansible import constants as C
 from ansible.playbook.task_include import TaskInclude
 from ansible.playbook.role.include import RoleInclude
@@ -47,6 +47,7 @@ class PlaybookParser(object):
   scopes = {}
   errors = []
   jinja_errors = []
+  dependencies = set()
 
   basedir = None
   filename = None
@@ -56,8 +57,11 @@ class PlaybookParser(object):
   variable_manager = None
   current_play = None
   jinja_config = None
+  history_size = 0
+  session = None
+  role_summaries = {}
 
-  def __init__(self, filename, basedir=None, jinja_config=None):
+  def __init__(self, filename, basedir=None, jinja_config=None, history_size=0, session=None):
     super(PlaybookParser, self).__init__()
     if filename is None or not isinstance(filename, str):
       raise Exception('Invalid filename')
@@ -66,22 +70,28 @@ class PlaybookParser(object):
     if self.basedir is None or not isinstance(basedir, str):
       self.basedir = '.'
     self.jinja_config = jinja_config
+    # actions kept per variable for the history output, None keeps all
+    self.history_size = history_size
+    # shared with other parsers of the same basedir, a new one per run if None
+    self.session = session
 
   def _reset_vars(self):
     self.scopes = {}
     self.errors = []
     self.jinja_errors = []
-    self.loader = DataLoader()
-    self.loader.set_basedir(self.basedir)
-    self.inventory = InventoryManager(loader=self.loader, sources=None)
-    self.variable_manager = VariableManager(loader=self.loader, inventory=self.inventory)
-    self.playbook = Playbook.load(self.filename, loader=self.loader, variable_manager=self.variable_manager)
+    self.dependencies = set([os.path.abspath(self.filename)])
+    session = self.session if self.session is not None else AnalysisSession(self.basedir)
+    self.loader = session.loader
+    self.inventory = session.inventory
+    self.variable_manager = session.variable_manager
+    self.role_summaries = session.role_summaries
 
   def _process_play(self, play):
     self.current_play = play
     if play.get_name() not in self.scopes:
-      self.scopes[play.get_name()] = Scope()
+      self.scopes[play.get_name()] = Scope(history_size=self.history_size)
     scope = self.scopes[play.get_name()]
+    self._add_vars_files_dependencies(play)
     # for var in play.get_vars():
     #   self.add_vars(scope, self.get_jinja_vars(play.vars[var], None, other_scope='play var, ' + str(var)), 'used')
     # print(play.get_vars())
@@ -102,27 +112,74 @@ class PlaybookParser(object):
     for task in flush_block.block:
         task.implicit = True
 
-    block_list = []
+    for role in play.roles:
+      self._process_role_vars(scope, role)
 
-    block_list.extend(play.pre_tasks)
-    block_list.append(flush_block)
+    self._process_blocks(scope, play.pre_tasks + [flush_block])
+    # the blocks of play._compile_roles, role by role
+    for role in play.roles:
+      if not role.from_include:
+        self._process_role_blocks(scope, role, role.get_role_params(), role._from_files, lambda: role)
+    self._process_blocks(scope, play.tasks + [flush_block] + play.post_tasks + [flush_block])
 
-    if len(play.roles) > 0:
-      for role in play.roles:
-        self._process_set_fact_args_jinja(scope, role.get_default_vars(), None, other_scope='role default vars')
-        self._process_set_fact_args(scope, role.get_default_vars(), None, other_scope='role default vars')
-        self._process_set_fact_args_jinja(scope, role.get_vars(), None, other_scope='role vars')
-        self._process_set_fact_args(scope, role.get_vars(), None, other_scope='role vars')
-
-    block_list.extend(play._compile_roles())
-    block_list.extend(play.tasks)
-    block_list.append(flush_block)
-    block_list.extend(play.post_tasks)
-    block_list.append(flush_block)
-    for block in block_list:
+  def _process_blocks(self, scope, blocks):
+    for block in blocks:
       if block.has_tasks():
         self._process_block(scope, block.block)
 
+  def _get_role_key(self, kind, role_path, *args):
+    # roles are looked up relative to the playbook, the results depend on the jinja config
+    fingerprint = self.jinja_config.fingerprint() if self.jinja_config is not None else None
+    return (kind, self.playbook._basedir, fingerprint, role_path) + args
+
+  def _process_role_vars(self, scope, role):
+    default_vars = role.get_default_vars()
+    role_vars = role.get_vars()
+    def process(scope):
+      self._add_role_dependencies(role)
+      self._process_set_fact_args_jinja(scope, default_vars, None, other_scope='role default vars')
+      self._process_set_fact_args(scope, default_vars, None, other_scope='role default vars')
+      self._process_set_fact_args_jinja(scope, role_vars, None, other_scope='role vars')
+      self._process_set_fact_args(scope, role_vars, None, other_scope='role vars')
+    self._process_cached(scope, self._get_role_key('vars', role._role_path, freeze([default_vars, role_vars])), process)
+
+  def _process_role_blocks(self, scope, role_include, params, from_files, load_role):
+    def process(scope):
+      role = load_role()
+      self._add_role_dependencies(role)
+      self._process_blocks(scope, role.compile(self.current_play))
+    key = self._get_role_key('blocks', role_include._role_path, freeze(params), freeze(from_files))
+    self._process_cached(scope, key, process)
+
+  def _process_cached(self, scope, key, process):
+    """Calls process with a scope recording what it adds to scope and keeps
+    a RoleSummary of it under key, or replays the summary kept before."""
+    summary = self.role_summaries.get(key)
+    if summary is not None and summary.is_valid():
+      summary.replay(scope)
+      self.errors.extend(self._move_errors(summary.errors))
+      self.jinja_errors.extend(self._move_errors(summary.jinja_errors))
+      self.dependencies.update(summary.dependencies)
+      return
+    errors, jinja_errors, dependencies = self.errors, self.jinja_errors, self.dependencies
+    self.errors, self.jinja_errors, self.dependencies = [], [], set()
+    recorder = RecordingScope(scope)
+    paths = self.loader.start_recording()
+    try:
+      try:
+        process(recorder)
+      finally:
+        self.dependencies.update(self.loader.stop_recording(paths))
+      self.role_summaries[key] = RoleSummary(recorder.changes, self.errors, self.jinja_errors, self.dependencies)
+    finally:
+      errors.extend(self.errors)
+      jinja_errors.extend(self.jinja_errors)
+      dependencies.update(self.dependencies)
+      self.errors, self.jinja_errors, self.dependencies = errors, jinja_errors, dependencies
+
+  def _move_errors(self, errors):
+    return [ErrorRecord(error.message, error.task, self.current_play, self.playbook, role=error.role, other_scope=error.other_scope) for error in errors]
+
   def _process_block(self, scope, block):
     for task in block:
       action = task._attributes['action'] if 'action' in task._attributes else 'unknown'
@@ -145,10 +202,7 @@ class PlaybookParser(object):
         self._process_task_attr(task_scope, t)
       elif action in C._ACTION_ALL_PROPER_INCLUDE_IMPORT_ROLES:
         ri = RoleInclude.load(task._role_name, play=self.current_play, variable_manager=self.variable_manager)
-        r = Role.load(ri, self.current_play)
-        for block in r.compile(self.current_play):
-          if block.has_tasks():
-            self._process_block(scope, block.block)
+        self._process_role_blocks(scope, ri, ri.get_role_params(), {}, lambda: Role.load(ri, self.current_play))
       elif action in C._ACTION_IMPORT_PLAYBOOK:
         self.errors.append(ErrorRecord('Playbook include not implemented yet', task, self.current_play, self.playbook, role=task._role))
       elif action in C._ACTION_INCLUDE_VARS:
@@ -165,13 +219,9 @@ class PlaybookParser(object):
         elif attr in PROPERTIES:
           if isinstance(attr_value, list) or isinstance(attr_value, tuple):
             for attr_item in attr_value:
-              if attr in NO_BLOCK:
-                attr_item = '{{ ' + str(attr_item) + ' }}'
-              self.add_vars(task_scope, self.get_jinja_vars(attr_item, task), 'used')
+              self.add_vars(task_scope, self.get_jinja_vars(attr_item, task, expression=attr in NO_BLOCK), 'used')
           else:
-            if attr in NO_BLOCK:
-              attr_value = '{{ ' + str(attr_value) + ' }}'
-            self.add_vars(task_scope, self.get_jinja_vars(attr_value, task), 'used')
+            self.add_vars(task_scope, self.get_jinja_vars(attr_value, task, expression=attr in NO_BLOCK), 'used')
         elif attr in ['block', 'rescue', 'always']:
           self._process_block(task_scope, attr_value)
         elif attr == 'args':
@@ -230,13 +280,39 @@ class PlaybookParser(object):
             self.errors.append(ErrorRecord('Set fact var: ' + name + ' is a reserved magic variable', task, self.current_play, self.playbook, role=task._role))
           scope.add_attribute(name, temp, 'changed')
 
+  def _add_role_dependencies(self, role):
+    # the files of play roles are read by Playbook.load, before any role is
+    # processed, so they are not recorded by the loader in _process_cached
+    for r in [role] + role.get_all_dependencies():
+      for (path, _dirnames, filenames) in os.walk(r._role_path):
+        self.dependencies.add(os.path.abspath(path))
+        for filename in filenames:
+          self.dependencies.add(os.path.abspath(os.path.join(path, filename)))
+
+  def _add_vars_files_dependencies(self, play):
+    # vars_files are only read when the play runs, relative to the playbook
+    for vars_file in play.get_vars_files():
+      for path in vars_file if isinstance(vars_file, list) else [vars_file]:
+        if isinstance(path, str) and '{{' not in path:
+          self.dependencies.add(os.path.abspath(os.path.join(self.playbook._basedir, path)))
+
   def process(self):
     self._reset_vars()
-    for play in self.playbook.get_plays():
-      self._process_play(play)
+    # every file read and directory searched while loading and analyzing the
+    # playbook, including included playbooks and imported task files
+    paths = self.loader.start_recording()
+    try:
+      self.playbook = Playbook.load(self.filename, loader=self.loader, variable_manager=self.variable_manager)
+      for play in self.playbook.get_plays():
+        self._process_play(play)
+    finally:
+      self.dependencies.update(self.loader.stop_recording(paths))
 
-  def get_jinja_vars(self, string, task, other_scope=None):
+  def get_jinja_vars(self, string, task, other_scope=None, expression=False):
+    # conditions are bare expressions, without {{ }}
     try:
+      if expression:
+        return jinja.infer_expression(str(string), self.jinja_config)
       variables = jinja.infer(string, self.jinja_config)
       return variables
     except Exception as e:
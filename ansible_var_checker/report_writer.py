@@ -0,0 +1,96 @@
+import json
+
+
+class YamlWriter(object):
+  """Writes the nested dicts of Scope.get_undefined and Scope.get_all to a
+  file object in the format of YamlConstructor, line by line.
+
+  Memory use depends on the depth of the dicts only, not on their size.
+  """
+
+  def __init__(self, stream, new_line='\n', tab='  '):
+    super(YamlWriter, self).__init__()
+    self.stream = stream
+    self.new_line = new_line
+    self.tab = tab
+
+  def _write_leaf(self, current_tab, key, value):
+    if isinstance(value, list) or isinstance(value, tuple):
+      self.stream.write(current_tab + key + ':' + self.new_line)
+      for item in value:
+        self.stream.write(current_tab + self.tab + '- ' + str(item) + self.new_line)
+    else:
+      self.stream.write(current_tab + key + ': \'\'' + self.new_line)
+
+  def write(self, dict_val, current_tab=''):
+    if not isinstance(dict_val, dict):
+      self.stream.write('Invalid dict_val')
+      return
+    stack = [(current_tab, iter(dict_val.items()))]
+    while stack:
+      tab, items = stack[-1]
+      for key, value in items:
+        if isinstance(value, dict) and len(value) > 0:
+          self.stream.write(tab + key + ':' + self.new_line)
+          stack.append((tab + self.tab, iter(value.items())))
+          break
+        self._write_leaf(tab, key, value)
+      else:
+        stack.pop()
+
+  def write_paths(self, paths, current_tab=''):
+    """Writes (path, value) pairs as yielded by Scope.iter_undefined and
+    Scope.iter_all, giving the same output as write does for the dict built
+    from them."""
+    previous = ()
+    for path, value in paths:
+      common = 0
+      while common < len(previous) - 1 and common < len(path) - 1 and previous[common] == path[common]:
+        common += 1
+      for depth in range(common, len(path) - 1):
+        self.stream.write(current_tab + self.tab * depth + path[depth] + ':' + self.new_line)
+      self._write_leaf(current_tab + self.tab * (len(path) - 1), path[-1], value)
+      previous = path
+
+
+class JsonWriter(object):
+  """Writes values as JSON to a file object chunk by chunk.
+
+  Without indent a dict with string keys is written one item at a time,
+  each encoded in one go, which is much faster than encoding it chunk by
+  chunk.
+  """
+
+  def __init__(self, stream, indent=None, sort_keys=False):
+    super(JsonWriter, self).__init__()
+    self.stream = stream
+    self.encoder = json.JSONEncoder(indent=indent, sort_keys=sort_keys)
+
+  def write(self, value):
+    if self.encoder.indent is not None or not isinstance(value, dict) or not all(isinstance(key, str) for key in value):
+      for chunk in self.encoder.iterencode(value):
+        self.stream.write(chunk)
+      return
+    items = sorted(value.items()) if self.encoder.sort_keys else value.items()
+    self.stream.write('{')
+    for i, (key, item) in enumerate(items):
+      if i > 0:
+        self.stream.write(', ')
+      self.stream.write(self.encoder.encode(key) + ': ' + self.encoder.encode(item))
+    self.stream.write('}')
+
+
+class NdjsonWriter(object):
+  """Writes one JSON document per line to a file object, flushing after
+  every record unless flush is False, so the output can be consumed while
+  it is written."""
+
+  def __init__(self, stream, flush=True):
+    super(NdjsonWriter, self).__init__()
+    self.stream = stream
+    self.flush = flush
+
+  def write(self, record):
+    self.stream.write(json.dumps(record) + '\n')
+    if self.flush:
+      self.stream.flush()
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+from info import __version__
+from summary import PlaybookSummary
+from file_utils import get_mtime
+
+DEFAULT_CACHE_DIR = '.ansible_var_checker_cache'
+
+
+def hash_file(path):
+  digest = hashlib.sha1()
+  with open(path, 'rb') as f:
+    for chunk in iter(lambda: f.read(65536), b''):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+
+class ResultCache(object):
+  """On-disk cache of PlaybookSummary objects.
+
+  An entry is stored per playbook and analyzer version together with the
+  mtime, size and content hash of every file the summary depends on. The
+  entry is used only while all of them are unchanged; a file whose mtime or
+  size changed is re-hashed, so touching a file does not invalidate entries.
+  Directories that were searched for files and files that did not exist are
+  kept with their mtime only, so adding a file to them invalidates entries.
+  """
+
+  def __init__(self, cache_dir=DEFAULT_CACHE_DIR, salt=''):
+    super(ResultCache, self).__init__()
+    self.cache_dir = cache_dir
+    # anything else the results depend on, such as analysis options
+    self.salt = salt
+    # path -> (mtime, size, hash) of files already hashed in this process
+    self._file_states = {}
+    self.hits = 0
+    self.misses = 0
+
+  def _entry_path(self, filename):
+    key = json.dumps([__version__, self.salt, os.path.abspath(filename)])
+    return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+  def _get_file_state(self, path):
+    stat = os.stat(path)
+    state = self._file_states.get(path)
+    if state is None or state[0] != stat.st_mtime or state[1] != stat.st_size:
+      state = (stat.st_mtime, stat.st_size, hash_file(path))
+      self._file_states[path] = state
+    return state
+
+  def _is_fresh(self, dependencies):
+    for path, mtime, size, digest in dependencies:
+      if digest is None:
+        if get_mtime(path) != mtime or os.path.isfile(path):
+          return False
+        continue
+      if not os.path.isfile(path):
+        return False
+      stat = os.stat(path)
+      if stat.st_mtime == mtime and stat.st_size == size:
+        continue
+      if self._get_file_state(path)[2] != digest:
+        return False
+    return True
+
+  def get(self, filename):
+    """Returns the cached PlaybookSummary of filename or None if there is no
+    entry or any of the files it depends on has changed."""
+    try:
+      with open(self._entry_path(filename), 'r') as f:
+        entry = json.load(f)
+    except (IOError, OSError, ValueError):
+      self.misses += 1
+      return None
+    if entry.get('version') != __version__ or not self._is_fresh(entry['dependencies']):
+      self.misses += 1
+      return None
+    self.hits += 1
+    return PlaybookSummary.from_dict(entry['summary'])
+
+  def put(self, filename, summary):
+    # created first, the cache directory may be one of the dependencies
+    if not os.path.isdir(self.cache_dir):
+      try:
+        os.makedirs(self.cache_dir)
+      except OSError:
+        if not os.path.isdir(self.cache_dir):
+          raise
+    dependencies = []
+    for path in summary.dependencies:
+      if os.path.isfile(path):
+        mtime, size, digest = self._get_file_state(path)
+        dependencies.append((path, mtime, size, digest))
+      else:
+        dependencies.append((path, get_mtime(path), None, None))
+    entry = {
+      'version': __version__,
+      'dependencies': dependencies,
+      'summary': summary.to_dict()
+    }
+    entry_path = self._entry_path(filename)
+    temp_path = entry_path + '.' + str(os.getpid()) + '.tmp'
+    with open(temp_path, 'w') as f:
+      json.dump(entry, f)
+    os.rename(temp_path, entry_path)
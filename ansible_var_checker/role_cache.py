@@ -0,0 +1,44 @@
+import json
+from file_utils import get_mtime
+
+
+def freeze(value):
+  """Returns a string that is equal for equal role params or vars, to be used
+  in the key of a RoleSummary."""
+  try:
+    return json.dumps(value, sort_keys=True, default=repr)
+  except TypeError:
+    return repr(value)
+
+
+class RoleSummary(object):
+  """What analyzing the vars or the tasks of a role added to a play: the
+  changes recorded by a RecordingScope, the errors, and the files it depends
+  on with their mtimes, so it can be replayed into other plays until one of
+  the files changes.
+
+  Errors keep the play and playbook they were found in, PlaybookParser
+  creates them again for the play the summary is replayed into.
+  """
+
+  def __init__(self, changes, errors, jinja_errors, dependencies):
+    super(RoleSummary, self).__init__()
+    self.changes = changes
+    self.errors = errors
+    self.jinja_errors = jinja_errors
+    # the directories searched are included, so files added to them are noticed
+    self.dependencies = dependencies
+    self.mtimes = dict((path, get_mtime(path)) for path in dependencies)
+
+  def is_valid(self):
+    for path, mtime in self.mtimes.items():
+      if get_mtime(path) != mtime:
+        return False
+    return True
+
+  def replay(self, scope):
+    for name, attribute, action in self.changes:
+      if attribute is None:
+        scope.add_variable(name, action)
+      else:
+        scope.add_attribute(name, list(attribute), action)
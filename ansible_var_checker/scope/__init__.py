@@ -1,3 +1,4 @@
 from .access_type import AccessType
 from .error_record import ErrorRecord
 from .scope import Scope
+from .recording_scope import RecordingScope
@@ -1,3 +1,5 @@
+from collections import deque
+from itertools import repeat
 import pprint
 
 ACCESS_TYPE_USED = 'used'
@@ -11,12 +13,27 @@ ACCESS_TYPE_PROPER_DEFINED = [ACCESS_TYPE_CHANGED, ACCESS_TYPE_REGISTERED, ACCES
 ACCESS_TYPE_USED_REFERENCED = [ACCESS_TYPE_USED, ACCESS_TYPE_REFERENCED]
 ACCESS_TYPE_ALL = ACCESS_TYPE_PROPER_DEFINED + ACCESS_TYPE_USED_REFERENCED + [ACCESS_TYPE_MAGIC]
 
+# default of AccessType.copy, None already means keeping every action
+_KEEP = object()
+
 class AccessType(object):
+  """Accesses of a variable or attribute.
+
+  Only the first action and a counter per action are kept. With a
+  history_size other than 0 the most recent actions are also kept in order,
+  all of them if it is None.
+  """
+
+  __slots__ = ('first_action', 'counts', 'history', 'attributes', 'indexes', 'frozen')
 
-  def __init__(self):
-    self.actions = []
+  def __init__(self, history_size=0):
+    self.first_action = None
+    self.counts = {}
+    self.history = deque(maxlen=history_size) if history_size != 0 else None
     self.attributes = {}
     self.indexes = {}
+    # frozen access types are shared and must be copied before they are changed
+    self.frozen = False
 
   def __repr__(self):
     output = {}
@@ -25,36 +42,78 @@ class AccessType(object):
     output['indexes'] = pprint.pformat(self.indexes)
     return pprint.pformat(output)
 
+  @property
+  def history_size(self):
+    if self.history is None:
+      return 0
+    return self.history.maxlen
+
+  @property
+  def actions(self):
+    """The kept history or, without one, the first action followed by the
+    other actions grouped by type in the order of ACCESS_TYPE_ALL, which is
+    not the order they happened in"""
+    if self.history is not None:
+      return list(self.history)
+    if self.first_action is None:
+      return []
+    actions = [self.first_action]
+    for action in ACCESS_TYPE_ALL:
+      count = self.counts.get(action, 0)
+      if action == self.first_action:
+        count -= 1
+      actions.extend([action] * count)
+    return actions
+
+  def freeze(self):
+    self.frozen = True
+    for value in self.attributes.values():
+      value.freeze()
+    for value in self.indexes.values():
+      value.freeze()
+    return self
+
+  def copy(self, history_size=_KEEP):
+    """Returns a deep copy that is not frozen, keeping history_size actions
+    (by default as many as this one keeps, all of them if None)"""
+    if history_size is _KEEP:
+      history_size = self.history_size
+    rv = AccessType(history_size=history_size)
+    rv.first_action = self.first_action
+    rv.counts = dict(self.counts)
+    if rv.history is not None:
+      rv.history.extend(self.actions)
+    rv.attributes = dict((key, value.copy(history_size)) for key, value in self.attributes.items())
+    rv.indexes = dict((key, value.copy(history_size)) for key, value in self.indexes.items())
+    return rv
+
+  def _validate_not_frozen(self):
+    if self.frozen:
+      raise Exception('Frozen access type can not be changed')
+
   @staticmethod
   def validate_action(action):
     if action not in ACCESS_TYPE_ALL:
       raise Exception('Invalid action ' + str(action))
 
   def has_attr(self):
-    return len(self.attributes.keys()) > 0
+    return len(self.attributes) > 0
+
+  def count(self, action):
+    return self.counts.get(action, 0)
 
   def is_undefined(self):
-    if len(self.actions) == 0:
+    if self.first_action is None:
       return True
-    return self.actions[0] in ACCESS_TYPE_USED_REFERENCED
+    return self.first_action in ACCESS_TYPE_USED_REFERENCED
 
   def is_magic(self):
-    if len(self.actions) == 0:
-      return False
-    return self.actions[0] in [ACCESS_TYPE_MAGIC]
+    return self.first_action == ACCESS_TYPE_MAGIC
 
   def is_magic_used(self):
-    if len(self.actions) == 0:
+    if self.first_action != ACCESS_TYPE_MAGIC:
       return False
-    has_used = False
-    if self.actions[0] in [ACCESS_TYPE_MAGIC]:
-      temp_actions = list(self.actions)
-      temp_actions.pop(0)
-      for action in temp_actions:
-        if action in ACCESS_TYPE_USED_REFERENCED:
-          has_used = True
-          break
-    return has_used
+    return self.counts.get(ACCESS_TYPE_USED, 0) + self.counts.get(ACCESS_TYPE_REFERENCED, 0) > 0
 
   def construct_from_attr(self, with_history=False):
     if not self.has_attr():
@@ -67,8 +126,14 @@ class AccessType(object):
     return output
 
   def add(self, action, count=1):
-    for i in range(count):
-      self.actions.append(action)
+    self._validate_not_frozen()
+    if count <= 0:
+      return
+    if self.first_action is None:
+      self.first_action = action
+    self.counts[action] = self.counts.get(action, 0) + count
+    if self.history is not None:
+      self.history.extend(repeat(action, count))
 
   def add_registered(self, count=1):
     self.add(ACCESS_TYPE_REGISTERED, count=count)
@@ -86,6 +151,7 @@ class AccessType(object):
     self.add(ACCESS_TYPE_REFERENCED, count=count)
 
   def add_attribute(self, attribute, action, count=1):
+    self._validate_not_frozen()
     AccessType.validate_action(action)
     if isinstance(attribute, list):
       attribute_item = attribute.pop(0)
@@ -95,13 +161,14 @@ class AccessType(object):
     action_params = {}
     action_params[action] = count
     if attribute_item not in self.attributes:
-      self.attributes[attribute_item] = AccessType()
+      self.attributes[attribute_item] = AccessType(history_size=self.history_size)
     if len(attribute) == 0:
       self.attributes[attribute_item].add(action, count=count)
     else:
       self.attributes[attribute_item].add_attribute(attribute, action, count=count)
 
   def add_indexed(self, index, action, count=1):
+    self._validate_not_frozen()
     AccessType.validate_action(action)
     if isinstance(index, list):
       index_item = index.pop(0)
@@ -111,7 +178,7 @@ class AccessType(object):
     action_params = {}
     action_params[action] = count
     if index_item not in self.attributes:
-      self.indexes[index_item] = AccessType()
+      self.indexes[index_item] = AccessType(history_size=self.history_size)
     if len(index) == 0:
       self.indexes[index_item].add(action, count=count)
     else:
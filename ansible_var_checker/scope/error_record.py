@@ -29,5 +29,11 @@ class ErrorRecord(object):
       scope_string += '[o]' + str(self.other_scope)
     return scope_string
 
+  def to_dict(self):
+    return {
+      'scope': self.construct_scope(),
+      'message': str(self.message)
+    }
+
   def __repr__(self):
     return self.construct_scope() + ': ' + str(self.message)
@@ -0,0 +1,28 @@
+class RecordingScope(object):
+  """Forwards the calls PlaybookParser makes to a scope and records the
+  variables and attributes added, so they can be replayed into another scope.
+
+  Children record into the variable table of the root scope, so changes made
+  through a child are recorded in the same list and replayed into the root.
+  """
+
+  def __init__(self, scope, changes=None):
+    super(RecordingScope, self).__init__()
+    self.scope = scope
+    # (name, attribute tuple or None, action) in the order they were added
+    self.changes = changes if changes is not None else []
+
+  def add_variable(self, name, action):
+    self.changes.append((name, None, action))
+    return self.scope.add_variable(name, action)
+
+  def add_attribute(self, name, attribute, action):
+    self.changes.append((name, tuple(attribute), action))
+    return self.scope.add_attribute(name, attribute, action)
+
+  def is_magic(self, name):
+    return self.scope.is_magic(name)
+
+  def create_child(self):
+    return RecordingScope(self.scope.create_child(), self.changes)
+
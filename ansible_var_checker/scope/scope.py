@@ -1,4 +1,5 @@
 from .access_type import AccessType
+from sys import intern
 import pprint
 
 MAGIC_VARS = {
@@ -278,15 +279,55 @@ MAGIC_VARS = {
   }
 }
 
+# id of a magic vars dict -> (the dict, its frozen variable table)
+_magic_layers = {}
+
+def get_magic_layer(magic_vars=MAGIC_VARS):
+  """Returns the variable table of magic_vars, built once and shared by all
+  root scopes. magic_vars must not be changed after it was first used."""
+  entry = _magic_layers.get(id(magic_vars))
+  if entry is None:
+    scope = Scope(magic_vars=None)
+    scope.inject_magic_vars(magic_vars=magic_vars)
+    for variable in scope.variables.values():
+      variable.freeze()
+    # the dict is kept so that its id is not reused
+    entry = _magic_layers[id(magic_vars)] = (magic_vars, scope.variables)
+  return entry[1]
+
 class Scope(object):
+  """Variables seen in a play.
+
+  Child scopes, such as the ones of loop tasks, record into the variable
+  table of the root scope directly, so writes do not depend on how deep the
+  chain is. Reads through a child only see its own variables, which stay
+  empty, so for example a magic variable used as the loop_var of a loop task
+  is not reported.
+
+  The magic variables of a root scope come from the shared, frozen table of
+  get_magic_layer and are copied when a playbook records something for them.
+
+  history_size is the number of most recent actions kept per variable, see
+  AccessType; child scopes use the one of their root. With the default of 0
+  the actions listed with with_history are grouped by type, so pass None to
+  list them in order.
+  """
 
-  def __init__(self, parent=None, host=None, magic_vars=MAGIC_VARS):
+  def __init__(self, parent=None, host=None, magic_vars=MAGIC_VARS, history_size=0):
     self.parent = parent
     self.host = host
     self.children = []
-    self.variables = {}
-    if self.parent is None:
-      self.inject_magic_vars(magic_vars=MAGIC_VARS)
+    self.history_size = history_size
+    if self.parent is not None:
+      self.history_size = self.parent.history_size
+      self.variables = {}
+      self.root_variables = self.parent.root_variables
+      return
+    if magic_vars is None:
+      self.variables = {}
+    else:
+      self.variables = dict(get_magic_layer(magic_vars))
+    self.root_variables = self.variables
 
   def inject_magic_vars(self, magic_vars=MAGIC_VARS, trail=[]):
     for key, value in magic_vars.items():
@@ -305,23 +346,25 @@ class Scope(object):
   def __repr__(self):
     return pprint.pformat(self.variables)
 
-  def add_variable(self, name, action, ignore_parent=False):
-    if ignore_parent or self.parent is None:
-      if name not in self.variables:
-        self.variables[name] = AccessType()
-      self.variables[name].add(action)
-    elif not self.parent.add_variable(name, action, ignore_parent=ignore_parent):
-      return self.add_variable(name, action, ignore_parent=True)
+  def _get_variable(self, name):
+    variables = self.root_variables
+    # names from YAML, such as int keys of vars, are stored as strings
+    key = intern(str(name))
+    variable = variables.get(key)
+    if variable is None:
+      variable = variables[key] = AccessType(history_size=self.history_size)
+    elif variable.frozen:
+      variable = variables[key] = variable.copy(history_size=self.history_size)
+    return variable
+
+  def add_variable(self, name, action):
+    self._get_variable(name).add(action)
     return True
 
-  def add_attribute(self, name, attribute, action, ignore_parent=False):
-    if ignore_parent or self.parent is None:
-      if name not in self.variables:
-        self.variables[name] = AccessType()
-      self.variables[name].add(action)
-      self.variables[name].add_attribute(attribute, action)
-    elif not self.parent.add_attribute(name, attribute, action, ignore_parent=ignore_parent):
-      return self.add_attribute(name, attribute, action, ignore_parent=True)
+  def add_attribute(self, name, attribute, action):
+    variable = self._get_variable(name)
+    variable.add(action)
+    variable.add_attribute(attribute, action)
     return True
 
   def construct_with_attr(self, name, with_history=False):
@@ -330,105 +373,83 @@ class Scope(object):
     return self.variables[name].construct_from_attr(with_history=with_history)
 
   def is_undefined(self, name, trail=[]):
-    print ('--is_undefined')
-    if name == 'undefined':
-      if name not in self.variables:
-        print('Not in variables')
-        return True
-      if self.variables[name].is_undefined():
-        print('is undefined')
-        if self.parent is not None:
-          print('parent not none')
-          return self.parent.is_undefined(name, trail)
-        return True
-      return False
-    if len(trail) > 0:
-      print (name)
-      current_vars = self.variables
-      for key in trail:
-        if key not in current_vars:
-          return True
-        current_vars = current_vars[key]
-      if name not in current_vars:
-        return True
-      if current_vars[name].is_undefined():
-        if self.parent is not None:
-          return self.parent.is_undefined(name, trail)
-        return True
-    else:
-      if name not in self.variables:
-        return True
-      if self.variables[name].is_undefined():
-        if self.parent is not None:
-          return self.parent.is_undefined(name, trail)
+    variables = self.variables
+    for key in trail:
+      if key not in variables:
         return True
-    return False
+      variables = variables[key].attributes
+    if name not in variables:
+      return True
+    return variables[name].is_undefined()
 
   def is_magic(self, name):
-    if name not in self.variables:
-      return False
-    if self.variables[name].is_magic():
-      if self.parent is not None:
-        return self.parent.is_magic(name)
-      return True
-    return False
+    variable = self.variables.get(name)
+    return variable is not None and variable.is_magic()
 
   def is_magic_used(self, name):
-    if name not in self.variables:
-      return False
-    if self.variables[name].is_magic_used():
-      if self.parent is not None:
-        return self.parent.is_magic_used(name)
-      return True
-    return False
+    variable = self.variables.get(name)
+    return variable is not None and variable.is_magic_used()
 
-  def get_undefined(self, trail=[], exclude_magic=True, with_history=False):
-    output = {}
-    mod_trail = list(trail)
-    if len(mod_trail) > 0:
-      trail_popped = mod_trail.pop(0)
-      variable = self.variables[trail_popped]
-      if len(mod_trail) > 0:
-        for trail_key in mod_trail:
-          if trail_key in variable.attributes.keys():
-            trail_popped = trail_key
-            variable = variable.attributes[trail_key]
-          else:
-            return output
-      if variable.has_attr():
-        for key in variable.attributes.keys():
-          if variable.attributes[key].has_attr():
-            temp = list(trail)
-            temp.append(key)
-            child_undefined = self.get_undefined(trail=temp, exclude_magic=True, with_history=with_history)
-            if len(child_undefined.keys()) != 0:
-              if key not in output.keys():
-                output[key] = {}
-              output[key] = child_undefined
-          else:
-            if variable.attributes[key].is_undefined():
-              output[key] = variable.attributes[key].construct_from_attr(with_history=with_history)
-      else:
+  def _walk_undefined(self, trail, exclude_magic, with_history, output=None):
+    # depth first walk yielding (frame, key, value) for every undefined leaf,
+    # frame is [key, parent frame, output dict or None] of the leaf's parent
+    root = [None, None, output]
+    if len(trail) > 0:
+      variable = self.variables[trail[0]]
+      for key in trail[1:]:
+        if key not in variable.attributes:
+          return
+        variable = variable.attributes[key]
+      if not variable.has_attr():
         if variable.is_undefined():
-          output[trail_popped] = variable.construct_from_attr(with_history=with_history)
+          yield root, trail[-1], variable.construct_from_attr(with_history=with_history)
+        return
+      items = variable.attributes.items()
+      exclude_magic = False
     else:
-      for key in self.variables.keys():
-        if exclude_magic and self.is_magic(key):
+      items = self.variables.items()
+    stack = [(root, iter(items))]
+    while stack:
+      frame, items = stack[-1]
+      for key, variable in items:
+        if exclude_magic and frame is root and variable.is_magic():
           continue
-        if self.variables[key].has_attr():
-          temp = list(trail)
-          temp.append(key)
-          child_undefined = self.get_undefined(trail=temp, exclude_magic=True, with_history=with_history)
-          if len(child_undefined.keys()) != 0:
-            if key not in output.keys():
-              output[key] = {}
-            output[key] = child_undefined
-        else:
-          if self.is_undefined(key):
-            output[key] = self.construct_with_attr(key, with_history=with_history)
+        if variable.has_attr():
+          stack.append(([key, frame, None], iter(variable.attributes.items())))
+          break
+        if variable.is_undefined():
+          yield frame, key, variable.construct_from_attr(with_history=with_history)
+      else:
+        stack.pop()
+
+  def iter_undefined(self, trail=[], exclude_magic=True, with_history=False):
+    """Yields (path, value) for every undefined variable or attribute without
+    attributes of its own, depth first and in the order they were recorded.
+    path is relative to trail; value is what get_undefined puts at path."""
+    for frame, key, value in self._walk_undefined(trail, exclude_magic, with_history):
+      path = [key]
+      while frame[0] is not None:
+        path.append(frame[0])
+        frame = frame[1]
+      path.reverse()
+      yield tuple(path), value
+
+  def get_undefined(self, trail=[], exclude_magic=True, with_history=False):
+    output = {}
+    for frame, key, value in self._walk_undefined(trail, exclude_magic, with_history, output=output):
+      # create the dicts of the parents on the first undefined leaf below them
+      pending = []
+      while frame[2] is None:
+        pending.append(frame)
+        frame = frame[1]
+      container = frame[2]
+      for parent in reversed(pending):
+        parent[2] = container[parent[0]] = {}
+        container = parent[2]
+      container[key] = value
     return output
 
-  def get_all(self, exclude_magic=True, with_history=True):
+  def get_all(self, exclude_magic=True, with_history=False):
     output = {}
     for key in self.variables.keys():
       if exclude_magic and self.is_magic(key):
@@ -437,6 +458,26 @@ class Scope(object):
       output[key] = self.construct_with_attr(key, with_history=with_history)
     return output
 
+  def iter_all(self, exclude_magic=True, with_history=False):
+    """Yields (path, value) for every variable or attribute without attributes
+    of its own, and with with_history (path + ('_actions',), actions) for the
+    others, depth first and in the order get_all puts them."""
+    stack = [((), iter(self.variables.items()))]
+    while stack:
+      trail, items = stack[-1]
+      for key, variable in items:
+        if exclude_magic and len(trail) == 0 and variable.is_magic() and not variable.is_magic_used():
+          continue
+        path = trail + (key,)
+        if variable.has_attr():
+          if with_history:
+            yield path + ('_actions',), variable.actions
+          stack.append((path, iter(variable.attributes.items())))
+          break
+        yield path, variable.construct_from_attr(with_history=with_history)
+      else:
+        stack.pop()
+
   def get_debug(self, exclude_magic=True):
     output = {}
     for key in self.variables.keys():
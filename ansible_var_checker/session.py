@@ -0,0 +1,106 @@
+import os
+from ansible.parsing.dataloader import DataLoader
+from ansible.inventory.manager import InventoryManager
+from ansible.vars.manager import VariableManager
+from file_utils import get_mtime
+
+
+class SessionDataLoader(DataLoader):
+  """DataLoader whose file cache is kept between playbooks.
+
+  The mtime of a file is recorded before it is read and checked every time
+  the cached data is used, so a file changed on disk is read again.
+
+  Between start_recording and stop_recording, the paths of the files read
+  and of the directories searched for files are collected, so the playbooks
+  included, the task files imported and the role files that do not exist
+  yet are known as well.
+  """
+
+  def __init__(self):
+    super(SessionDataLoader, self).__init__()
+    # path -> mtime of the file when it was cached
+    self._mtimes = {}
+    # sets of paths collected by start_recording, innermost last
+    self._recordings = []
+    self.hits = 0
+    self.misses = 0
+
+  def start_recording(self):
+    paths = set()
+    self._recordings.append(paths)
+    return paths
+
+  def stop_recording(self, paths):
+    # by identity, sets of equal paths may be recorded at the same time
+    self._recordings = [recording for recording in self._recordings if recording is not paths]
+    return paths
+
+  def record(self, path):
+    if self._recordings:
+      path = os.path.abspath(self.path_dwim(path))
+      for paths in self._recordings:
+        paths.add(path)
+
+  def _record_searched(self, path):
+    # a file added to or removed from the directory changes its mtime
+    if self._recordings:
+      self.record(os.path.dirname(os.path.abspath(self.path_dwim(path))))
+
+  def path_exists(self, path):
+    self._record_searched(path)
+    return super(SessionDataLoader, self).path_exists(path)
+
+  def is_file(self, path):
+    self._record_searched(path)
+    return super(SessionDataLoader, self).is_file(path)
+
+  def is_directory(self, path):
+    self._record_searched(path)
+    return super(SessionDataLoader, self).is_directory(path)
+
+  def list_directory(self, path):
+    self.record(path)
+    return super(SessionDataLoader, self).list_directory(path)
+
+  def load_from_file(self, file_name, cache=True, unsafe=False, json_only=False):
+    path = self.path_dwim(file_name)
+    self.record(path)
+    if cache:
+      if path in self._FILE_CACHE and self._mtimes.get(path) == get_mtime(path):
+        self.hits += 1
+      else:
+        self._FILE_CACHE.pop(path, None)
+        self._mtimes[path] = get_mtime(path)
+        self.misses += 1
+    return super(SessionDataLoader, self).load_from_file(file_name, cache=cache, unsafe=unsafe, json_only=json_only)
+
+
+class AnalysisSession(object):
+  """The DataLoader, InventoryManager and VariableManager shared by the
+  PlaybookParser objects of one basedir, so roles and vars files used by
+  several playbooks are only read and parsed once, and the summaries of the
+  roles they analyzed."""
+
+  def __init__(self, basedir=None):
+    super(AnalysisSession, self).__init__()
+    self.basedir = basedir
+    if self.basedir is None or not isinstance(basedir, str):
+      self.basedir = '.'
+    self.reset()
+
+  def reset(self):
+    """Drops the cached files and starts over with new objects."""
+    self.loader = SessionDataLoader()
+    self.loader.set_basedir(self.basedir)
+    self.inventory = InventoryManager(loader=self.loader, sources=None)
+    self.variable_manager = VariableManager(loader=self.loader, inventory=self.inventory)
+    # key -> RoleSummary, see PlaybookParser._process_cached
+    self.role_summaries = {}
+
+  def stats(self):
+    return {
+      'hits': self.loader.hits,
+      'misses': self.loader.misses,
+      'size': len(self.loader._FILE_CACHE)
+    }
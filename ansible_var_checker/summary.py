@@ -0,0 +1,127 @@
+def iter_leaves(dict_val, trail=(), with_actions=False):
+  """Yields (path, value) for every key of the nested dicts of Scope.get_all
+  and Scope.get_undefined that has no attributes; '_actions' keys hold the
+  history of a parent and are skipped unless with_actions is set"""
+  for key, value in dict_val.items():
+    if key == '_actions' and not with_actions:
+      continue
+    path = trail + (key,)
+    if isinstance(value, dict) and len(value) > 0:
+      for leaf in iter_leaves(value, path, with_actions=with_actions):
+        yield leaf
+    else:
+      yield path, value
+
+
+class PlaybookSummary(object):
+  """Picklable result of analysing one playbook with PlaybookParser"""
+
+  def __init__(self, filename, scopes=None, errors=None, jinja_errors=None, dependencies=None):
+    super(PlaybookSummary, self).__init__()
+    self.filename = filename
+    # list of {'name': ..., 'undefined': ..., 'all': ...} in the parser's scope
+    # order, or of {'name': ..., 'scope': Scope, 'with_history': ...} if lazy
+    self.scopes = scopes if scopes is not None else []
+    # lists of {'scope': ..., 'message': ...}
+    self.errors = errors if errors is not None else []
+    self.jinja_errors = jinja_errors if jinja_errors is not None else []
+    # files the result depends on, the playbook itself included, and the
+    # directories searched for files, which may not exist
+    self.dependencies = dependencies if dependencies is not None else []
+
+  @classmethod
+  def from_parser(cls, parser, with_history=False, lazy=False):
+    """With lazy the scopes of parser are kept and walked when the summary is
+    reported instead of building their dicts, which only works in the process
+    that analyzed the playbook; to_dict builds them."""
+    scopes = []
+    for key in parser.scopes.keys():
+      if lazy:
+        scopes.append({'name': key, 'scope': parser.scopes[key], 'with_history': with_history})
+        continue
+      scopes.append({
+        'name': key,
+        'undefined': parser.scopes[key].get_undefined(with_history=with_history),
+        'all': parser.scopes[key].get_all(with_history=with_history)
+      })
+    errors = [error.to_dict() for error in parser.errors]
+    jinja_errors = [error.to_dict() for error in parser.jinja_errors]
+    return cls(parser.filename, scopes=scopes, errors=errors, jinja_errors=jinja_errors, dependencies=sorted(parser.dependencies))
+
+  @classmethod
+  def from_dict(cls, data):
+    return cls(data['filename'], scopes=data['scopes'], errors=data['errors'], jinja_errors=data['jinja_errors'], dependencies=data['dependencies'])
+
+  def to_dict(self):
+    return {
+      'filename': self.filename,
+      'scopes': [self._scope_to_dict(scope) for scope in self.scopes],
+      'errors': self.errors,
+      'jinja_errors': self.jinja_errors,
+      'dependencies': self.dependencies
+    }
+
+  @staticmethod
+  def _scope_to_dict(scope):
+    if 'scope' not in scope:
+      return scope
+    return {
+      'name': scope['name'],
+      'undefined': scope['scope'].get_undefined(with_history=scope['with_history']),
+      'all': scope['scope'].get_all(with_history=scope['with_history'])
+    }
+
+  @staticmethod
+  def iter_undefined(scope):
+    """Yields (path, value) for the undefined variables of an item of scopes,
+    as Scope.iter_undefined does"""
+    if 'scope' in scope:
+      return scope['scope'].iter_undefined(with_history=scope['with_history'])
+    return iter_leaves(scope['undefined'])
+
+  @staticmethod
+  def iter_all(scope):
+    """Yields (path, value) for all variables of an item of scopes, as
+    Scope.iter_all does"""
+    if 'scope' in scope:
+      return scope['scope'].iter_all(with_history=scope['with_history'])
+    return iter_leaves(scope['all'], with_actions=True)
+
+  def has_errors(self):
+    return len(self.errors) > 0
+
+  def has_jinja_errors(self):
+    return len(self.jinja_errors) > 0
+
+  def iter_records(self):
+    """Yields a dict per (scope, variable) with its status, 'undefined' or
+    'defined', and one per error, for machine readable output"""
+    for scope in self.scopes:
+      undefined = set(path for path, value in self.iter_undefined(scope))
+      for path, value in self.iter_all(scope):
+        if path[-1] == '_actions':
+          continue
+        record = {
+          'type': 'variable',
+          'playbook': self.filename,
+          'scope': scope['name'],
+          'variable': '.'.join(path),
+          'path': list(path),
+          'status': 'undefined' if path in undefined else 'defined'
+        }
+        if isinstance(value, list):
+          record['actions'] = [str(action) for action in value]
+        yield record
+    for kind, errors in [('normal', self.errors), ('jinja', self.jinja_errors)]:
+      for error in errors:
+        yield {
+          'type': 'error',
+          'playbook': self.filename,
+          'kind': kind,
+          'scope': error['scope'],
+          'message': error['message']
+        }
+
+  @staticmethod
+  def format_error(error):
+    return error['scope'] + ': ' + error['message']
@@ -0,0 +1,107 @@
+import os
+import time
+from file_utils import get_mtime
+
+
+class Watcher(object):
+  """Polls the inputs of a FileHandler and re-analyzes the playbooks affected
+  by a changed file.
+
+  analyze is called with a playbook filename and returns its PlaybookSummary.
+  on_summary is called with every summary, on_error with the filename and the
+  exception of a playbook that could not be analyzed (a file saved halfway
+  should not stop the watcher) and on_removed with the filename of every
+  playbook that disappeared. Everything runs in this process, so ansible
+  imports, the filter index and the jinja caches are only set up once.
+  """
+
+  def __init__(self, file_handler, analyze, on_summary, on_error=None, on_removed=None, interval=1.0):
+    super(Watcher, self).__init__()
+    self.file_handler = file_handler
+    self.analyze = analyze
+    self.on_summary = on_summary
+    self.on_error = on_error
+    self.on_removed = on_removed
+    self.interval = interval
+    # playbook -> files and directories its summary depends on
+    self.dependencies = {}
+    # watched path -> mtime when last seen
+    self.mtimes = {}
+
+  def _get_playbooks(self):
+    self.file_handler.construct_valids()
+    return set(self.file_handler.get_valid_files())
+
+  def _get_watched_paths(self, playbook):
+    # the dependencies include the directories searched for files, so that
+    # files added to a role are noticed
+    paths = set([playbook])
+    paths.update(self.dependencies.get(playbook, []))
+    return paths
+
+  def _update_mtimes(self, seen=None):
+    # mtimes seen before an analysis are kept, so changes made during it are
+    # picked up by the next poll
+    seen = seen if seen is not None else {}
+    # missing inputs are watched too, so they are analyzed once they appear
+    watched = set(self.file_handler.files.keys()) | set(self.file_handler.dirs.keys())
+    for playbook in self.dependencies:
+      watched.update(self._get_watched_paths(playbook))
+    self.mtimes = dict((path, seen[path] if path in seen else get_mtime(path)) for path in watched)
+
+  def _run(self, playbooks):
+    for playbook in sorted(playbooks):
+      try:
+        summary = self.analyze(playbook)
+      except Exception as e:
+        # keep watching the playbook itself until it can be analyzed
+        self.dependencies[playbook] = [os.path.abspath(playbook)]
+        if self.on_error is None:
+          raise
+        self.on_error(playbook, e)
+        continue
+      self.dependencies[playbook] = summary.dependencies
+      self.on_summary(summary)
+
+  def get_changed_paths(self, seen=None):
+    seen = seen if seen is not None else dict((path, get_mtime(path)) for path in self.mtimes)
+    return set(path for path, mtime in self.mtimes.items() if seen[path] != mtime)
+
+  def get_affected_playbooks(self, changed_paths):
+    affected = set()
+    for playbook in self.dependencies:
+      if changed_paths & self._get_watched_paths(playbook):
+        affected.add(playbook)
+    return affected
+
+  def poll(self):
+    """Checks the watched files once and re-analyzes what changed. Returns the
+    set of playbooks that were analyzed again."""
+    seen = dict((path, get_mtime(path)) for path in self.mtimes)
+    changed_paths = self.get_changed_paths(seen)
+    if not changed_paths:
+      return set()
+    playbooks = self._get_playbooks()
+    for playbook in set(self.dependencies) - playbooks:
+      del self.dependencies[playbook]
+      if self.on_removed is not None:
+        self.on_removed(playbook)
+    affected = self.get_affected_playbooks(changed_paths) | (playbooks - set(self.dependencies))
+    self._run(affected)
+    self._update_mtimes(seen)
+    return affected
+
+  def start(self):
+    self.dependencies = {}
+    self._run(self._get_playbooks())
+    self._update_mtimes()
+
+  def watch(self):
+    """Analyzes every playbook, then polls until interrupted."""
+    self.start()
+    try:
+      while True:
+        time.sleep(self.interval)
+        self.poll()
+    except KeyboardInterrupt:
+      pass
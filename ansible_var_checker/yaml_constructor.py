@@ -1,3 +1,6 @@
+from io import StringIO
+from report_writer import YamlWriter
+
 class YamlConstructor(object):
 
   def __init__(self, new_line='\n', tab='  '):
@@ -8,18 +11,9 @@ class YamlConstructor(object):
   def to_string(self, dict_val, current_string='', current_tab=''):
     if not isinstance(dict_val, dict):
       return 'Invalid dict_val'
-    string = current_string
-    for key, value in dict_val.items():
-      string += current_tab + key
-      if isinstance(value, dict):
-        if not len(value.keys()) == 0:
-          string += ':' + self.new_line
-          string = self.to_string(value, current_string=string, current_tab=current_tab + self.tab)
-          continue
-      if isinstance(value, list) or isinstance(value, tuple):
-        string += ':' + self.new_line
-        for item in value:
-          string += current_tab + self.tab + '- ' + str(item) + self.new_line
-        continue
-      string += ': \'\'' + self.new_line
-    return string
\ No newline at end of file
+    stream = StringIO()
+    self.write(stream, dict_val, current_tab=current_tab)
+    return current_string + stream.getvalue()
+
+  def write(self, stream, dict_val, current_tab=''):
+    YamlWriter(stream, new_line=self.new_line, tab=self.tab).write(dict_val, current_tab=current_tab)
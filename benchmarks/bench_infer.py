@@ -0,0 +1,124 @@
+"""Latency of :func:`jinja.infer` on small expressions, large generated
+templates, deep macro and include chains and deep attribute chains."""
+import os
+import shutil
+import sys
+import tempfile
+
+from common import generate_template, load_corpus, measure, print_results
+from analysis import build_config
+from jinja import Config, infer, infer_expression
+
+TEMPLATE_PACKAGE = 'bench_templates'
+
+
+def macro_chain(depth):
+  """Returns a template with ``depth`` macros, each calling the previous one."""
+  lines = ['{% macro m0(x) %}{{ x.value }}{% endmacro %}']
+  for i in range(1, depth):
+    lines.append('{% macro m' + str(i) + '(x) %}{{ m' + str(i - 1) + '(x) }}{{ x.name_' + str(i) + ' }}{% endmacro %}')
+  lines.append('{{ m' + str(depth - 1) + '(var) }}')
+  return '\n'.join(lines)
+
+
+def attribute_chain(depth):
+  return '{{ var.' + '.'.join('a' + str(i) for i in range(depth)) + ' }}'
+
+
+def lookup_chain(depth):
+  """Like attribute_chain, with every other attribute looked up as a key and a
+  filter, so the template is not answered by jinja.infer_simple."""
+  lookups = ''.join(('.a' if i % 2 else "['a") + str(i) + ('' if i % 2 else "']") for i in range(depth))
+  return '{{ hostvars[host]' + lookups + ' | upper }}'
+
+
+def create_include_chain(depth):
+  """Creates an importable package holding ``depth`` templates which include
+  each other and returns its parent directory."""
+  path = tempfile.mkdtemp()
+  package_dir = os.path.join(path, TEMPLATE_PACKAGE)
+  os.makedirs(os.path.join(package_dir, 'templates'))
+  with open(os.path.join(package_dir, '__init__.py'), 'w'):
+    pass
+  for i in range(depth):
+    with open(os.path.join(package_dir, 'templates', 'include_' + str(i) + '.html'), 'w') as f:
+      f.write('{{ var_' + str(i) + '.value }}\n')
+      if i + 1 < depth:
+        f.write('{% include "include_' + str(i + 1) + '.html" %}\n')
+  return path
+
+
+def inferable(strings, config, infer=infer):
+  """Drops the strings the engine rejects, such as unsupported calls."""
+  rv = []
+  for string in strings:
+    try:
+      infer(string, config, cache=None)
+    except Exception:
+      continue
+    rv.append(string)
+  return rv
+
+
+def run():
+  results = []
+  # the ansible filters, as PlaybookParser uses them
+  config = build_config()
+  strings = inferable(load_corpus(), config)
+  conditions = inferable(load_corpus(conditions=True), config, infer=infer_expression)
+
+  def corpus():
+    for string in strings:
+      infer(string, config, cache=None)
+
+  def corpus_conditions():
+    for condition in conditions:
+      infer_expression(condition, config, cache=None)
+
+  results.append(measure('infer: corpus strings (uncached)', corpus, strings=len(strings)))
+  results.append(measure('infer_expression: corpus conditions (uncached)', corpus_conditions, strings=len(conditions)))
+  results.append(measure('infer: single expression', lambda: infer('{{ item.name | upper }}', config, cache=None), number=1000))
+
+  # a when condition, as PlaybookParser used to wrap it and as it passes it now
+  condition = 'result.rc != 0 and item.name is defined'
+  results.append(measure('infer: condition as template', lambda: infer('{{ ' + condition + ' }}', config, cache=None), number=1000))
+  results.append(measure('infer_expression: condition', lambda: infer_expression(condition, config, cache=None), number=1000))
+
+  for statements in (300, 3000):
+    template = generate_template(variables=statements // 10, statements=statements)
+    results.append(measure('infer: generated template, {0} statements'.format(statements),
+                           lambda: infer(template, config, cache=None)))
+
+  for depth in (10, 50):
+    template = macro_chain(depth)
+    results.append(measure('infer: macro chain, depth {0}'.format(depth),
+                           lambda: infer(template, config, cache=None), number=10))
+
+  for depth in (5, 20, 100):
+    template = attribute_chain(depth)
+    results.append(measure('infer: attribute chain, depth {0}'.format(depth),
+                           lambda: infer(template, config, cache=None), number=100))
+    template = lookup_chain(depth)
+    results.append(measure('infer: lookup chain, depth {0}'.format(depth),
+                           lambda: infer(template, config, cache=None), number=100))
+
+  path = create_include_chain(20)
+  sys.path.insert(0, path)
+  try:
+    include_config = Config(PACKAGE_NAME=TEMPLATE_PACKAGE)
+    template = '{% include "include_0.html" %}'
+    results.append(measure('infer: include chain, depth 20',
+                           lambda: infer(template, include_config, cache=None), number=10))
+    # the last template of the chain includes nothing, like a shared layout
+    template = '{% include "include_19.html" %}\n' * 300
+    results.append(measure('infer: 300 includes of one template',
+                           lambda: infer(template, include_config, cache=None), number=10))
+  finally:
+    sys.path.remove(path)
+    sys.modules.pop(TEMPLATE_PACKAGE, None)
+    shutil.rmtree(path)
+  return results
+
+
+if __name__ == '__main__':
+  print_results(run())
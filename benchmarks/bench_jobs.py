@@ -0,0 +1,34 @@
+"""Wall time of analyzing the test-ansible-project playbooks with 1, 2, 4 and 8 worker processes."""
+import time
+
+from common import CORPUS_DIR, loadable_playbooks, print_results
+from analysis import analyze_files
+from jinja import infer_cache
+
+JOBS = [1, 2, 4, 8]
+# the corpus is small, so every playbook is analyzed several times per run
+COPIES = 8
+
+
+def run(jobs=JOBS, copies=COPIES):
+  files = loadable_playbooks() * copies
+  results = []
+  for job_count in jobs:
+    infer_cache.clear()
+    start = time.time()
+    for summary in analyze_files(files, basedir=CORPUS_DIR, jobs=job_count):
+      pass
+    elapsed = time.time() - start
+    results.append({
+      'name': 'analyze_files: jobs=' + str(job_count),
+      'number': 1,
+      'repeat': 1,
+      'best': elapsed,
+      'mean': elapsed,
+      'files': len(files),
+    })
+  return results
+
+
+if __name__ == '__main__':
+  print_results(run())
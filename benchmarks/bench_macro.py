@@ -0,0 +1,39 @@
+"""Latency of :func:`jinja.infer` on templates which call macros hundreds of times."""
+from common import measure, print_results
+from jinja import infer
+
+
+def macro_calls(calls, args):
+  """Returns a template defining a macro with ``args`` arguments, half of them
+  with defaults, and calling it ``calls`` times with positional and keyword arguments."""
+  names = ['arg_' + str(i) for i in range(args)]
+  params = names[:args // 2] + [name + '=""' for name in names[args // 2:]]
+  body = ''.join('{{ ' + name + ' }}' for name in names)
+  lines = ['{% macro field(' + ', '.join(params) + ') %}' + body + '{% endmacro %}']
+  for i in range(calls):
+    passed = ['form_' + str(i % 10) + '.' + name for name in names[:args // 2]]
+    passed += [name + '=form_' + str(i % 10) + '.' + name for name in names[args // 2:]]
+    lines.append('{{ field(' + ', '.join(passed) + ') }}')
+  return '\n'.join(lines)
+
+
+def macro_definitions(count):
+  """Returns a template with the same macro defined ``count`` times, as when a
+  template of macros is included over and over."""
+  definition = '{% macro field(name, value="") %}<input name="{{ name }}" value="{{ value }}">{% endmacro %}'
+  return '\n'.join([definition] * count)
+
+
+def run():
+  results = []
+  for calls, args in [(100, 5), (300, 10), (100, 50)]:
+    template = macro_calls(calls, args)
+    results.append(measure('infer: {0} calls of a macro with {1} arguments'.format(calls, args),
+                           lambda: infer(template, cache=None)))
+  template = macro_definitions(300)
+  results.append(measure('infer: 300 definitions of a macro', lambda: infer(template, cache=None)))
+  return results
+
+
+if __name__ == '__main__':
+  print_results(run())
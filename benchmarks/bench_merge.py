@@ -0,0 +1,55 @@
+"""Cost of :func:`jinja.mergers.merge` and :func:`jinja.mergers.is_compatible` on
+wide dictionaries, of inferring large generated templates and literals, where
+every statement or item is merged into the result, and of filter heavy
+expressions, where every visitor checks the predicted structure."""
+from common import generate_template, measure, print_results
+from analysis import build_config
+from jinja import infer
+from jinja.mergers import is_compatible, merge
+from jinja.model import Dictionary, Scalar
+
+FILTER_EXPRESSIONS = [
+  '{{ x | upper | lower | trim | capitalize }}',
+  '{{ (a | int) + (b | float) + (c | length) }}',
+  '{{ d | dictsort | first | last }}',
+  "{{ s | replace('a', 'b') | truncate(10) | wordcount }}",
+  "{{ v | regex_replace('a', 'b') | b64encode | upper }}",
+]
+
+
+def wide_dictionary(width, prefix):
+  return Dictionary(dict(
+    (prefix + str(i), Dictionary({'value': Scalar(linenos=[i])}, linenos=[i]))
+    for i in range(width)))
+
+
+def run():
+  results = []
+  for width in (100, 1000):
+    first = wide_dictionary(width, 'a_')
+    second = wide_dictionary(width, 'a_' if width == 100 else 'b_')
+    results.append(measure('merge: {0} keys'.format(width),
+                           lambda: merge(first, second), number=20))
+    results.append(measure('is_compatible: {0} keys'.format(width),
+                           lambda: is_compatible(first, second), number=20))
+  for variables in (100, 300, 1000):
+    template = generate_template(variables=variables, statements=variables * 3)
+    results.append(measure('infer: {0} variables, {1} statements'.format(variables, variables * 3),
+                           lambda: infer(template, cache=None), number=1))
+  for items in (100, 1000):
+    template = '{{ {' + ', '.join("'k{0}': v{0}".format(i) for i in range(items)) + '} }}'
+    results.append(measure('infer: dict literal, {0} items'.format(items),
+                           lambda: infer(template, cache=None), number=1))
+  config = build_config()
+
+  def filters():
+    for template in FILTER_EXPRESSIONS:
+      infer(template, config, cache=None)
+
+  results.append(measure('infer: filter heavy expressions', filters, number=100,
+                         expressions=len(FILTER_EXPRESSIONS)))
+  return results
+
+
+if __name__ == '__main__':
+  print_results(run())
@@ -0,0 +1,64 @@
+"""Memory per node and clone throughput of :mod:`jinja.model` structures."""
+import tracemalloc
+
+from common import measure, print_results
+from jinja.model import Dictionary, List, Scalar, Variable
+
+NODES = 100000
+
+
+def build_tree(width=100, depth=3, lineno=1):
+  if depth == 0:
+    return Scalar(label='leaf', linenos=[lineno])
+  data = {}
+  for i in range(width if depth > 1 else 10):
+    data['key_' + str(i)] = build_tree(width=10, depth=depth - 1, lineno=i)
+  return Dictionary(data, label='node', linenos=[lineno])
+
+
+def count_nodes(var):
+  if isinstance(var, Dictionary):
+    return 1 + sum(count_nodes(v) for v in var.data.values())
+  if isinstance(var, List):
+    return 1 + count_nodes(var.items)
+  return 1
+
+
+def memory_per_node(factory):
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  nodes = [factory(i) for i in range(NODES)]
+  after = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  return float(after - before) / len(nodes)
+
+
+def run():
+  tree = build_tree()
+  size = count_nodes(tree)
+  results = [
+    measure('clone: tree of {0} nodes'.format(size), tree.clone, number=10, nodes=size),
+  ]
+  for name, factory in [
+      ('Scalar', lambda i: Scalar(label='x', linenos=[i % 50])),
+      ('Variable', lambda i: Variable(label='x', linenos=[i % 50])),
+      ('Dictionary', lambda i: Dictionary({}, label='x', linenos=[i % 50])),
+  ]:
+    results.append({
+      'name': 'memory: ' + name,
+      'bytes_per_node': memory_per_node(factory),
+    })
+  return results
+
+
+def print_model_results(results):
+  for result in results:
+    if 'bytes_per_node' in result:
+      print('{0:<50} {1:>8.1f} bytes/node'.format(result['name'], result['bytes_per_node']))
+    else:
+      print_results([result])
+      print('{0:<50} {1:>8.0f} nodes/s'.format('', result['nodes'] / result['best']))
+
+
+if __name__ == '__main__':
+  print_model_results(run())
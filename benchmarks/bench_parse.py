@@ -0,0 +1,49 @@
+"""Per-string latency of :func:`jinja.parse` on the test-ansible-project corpus
+and of :func:`jinja.parse_expression` on its conditions."""
+import jinja2
+
+from common import load_corpus, measure, print_results
+from jinja.core import parse, parse_cache, parse_expression
+
+
+def run():
+  strings = load_corpus()
+  count = len(strings)
+  conditions = load_corpus(conditions=True)
+
+  def fresh_environment():
+    for string in strings:
+      jinja2.Environment().parse(string)
+
+  def shared_environment():
+    for string in strings:
+      parse(string, cache=None)
+
+  def cached():
+    for string in strings:
+      parse(string)
+
+  def shared_environment_conditions():
+    for condition in conditions:
+      parse_expression(condition, cache=None)
+
+  parse_cache.clear()
+  cached()
+  return [
+    measure('parse: new Environment per call', fresh_environment, strings=count),
+    measure('parse: shared Environment', shared_environment, strings=count),
+    measure('parse: shared Environment + AST cache', cached, strings=count),
+    measure('parse_expression: conditions, shared Environment', shared_environment_conditions, strings=len(conditions)),
+  ]
+
+
+def per_string(results):
+  for result in results:
+    result = dict(result)
+    result['best'] /= result['strings']
+    result['mean'] /= result['strings']
+    yield result
+
+
+if __name__ == '__main__':
+  print_results(per_string(run()))
@@ -0,0 +1,28 @@
+"""Wall time of :meth:`parser.PlaybookParser.process` over the playbooks of
+test-ansible-project which load with the installed ansible version."""
+from common import CORPUS_DIR, loadable_playbooks, measure, print_results
+from analysis import build_config
+from jinja import infer_cache
+from parser import PlaybookParser
+
+
+def run():
+  playbooks = loadable_playbooks()
+  config = build_config()
+
+  def process():
+    for playbook in playbooks:
+      PlaybookParser(playbook, basedir=CORPUS_DIR, jinja_config=config).process()
+
+  def process_uncached():
+    infer_cache.clear()
+    process()
+
+  return [
+    measure('process: corpus, cold infer cache', process_uncached, playbooks=len(playbooks)),
+    measure('process: corpus, warm infer cache', process, playbooks=len(playbooks)),
+  ]
+
+
+if __name__ == '__main__':
+  print_results(run())
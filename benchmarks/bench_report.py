@@ -0,0 +1,41 @@
+"""Time to render scope reports with :class:`yaml_constructor.YamlConstructor`
+and the streaming writers of :mod:`report_writer`."""
+import os
+
+from common import measure, print_results
+from report_writer import JsonWriter, YamlWriter
+from scope import Scope
+from yaml_constructor import YamlConstructor
+
+
+def build_scope(variables=2000, accesses=5):
+  """Returns a scope with ``variables`` variables which have a couple of
+  nested attributes, each accessed ``accesses`` times, keeping all history."""
+  scope = Scope(history_size=None)
+  for i in range(variables):
+    name = 'var_' + str(i)
+    for j in range(accesses):
+      scope.add_attribute(name, ['attr_' + str(j % 3), 'value'], 'used')
+      scope.add_attribute(name, ['attr_' + str(j % 3), 'name'], 'changed' if i % 2 else 'used')
+  return scope
+
+
+def run():
+  results = []
+  with open(os.devnull, 'w') as devnull:
+    for variables in (200, 2000):
+      scope = build_scope(variables=variables)
+      report = scope.get_all(with_history=True)
+      name = '{0} variables, get_all with history'.format(variables)
+      results.append(measure('to_string: ' + name, lambda: YamlConstructor().to_string(report)))
+      results.append(measure('YamlWriter: ' + name, lambda: YamlWriter(devnull).write(report)))
+      results.append(measure('JsonWriter: ' + name, lambda: JsonWriter(devnull).write(report)))
+      results.append(measure('YamlWriter.write_paths: {0} variables, undefined'.format(variables),
+                             lambda: YamlWriter(devnull).write_paths(scope.iter_undefined(with_history=True))))
+      results.append(measure('YamlWriter.write_paths: {0} variables, iter_all with history'.format(variables),
+                             lambda: YamlWriter(devnull).write_paths(scope.iter_all(with_history=True))))
+  return results
+
+
+if __name__ == '__main__':
+  print_results(run())
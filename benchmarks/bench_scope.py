@@ -0,0 +1,97 @@
+"""Cost of building a :class:`scope.Scope` and of collecting its undefined and
+all variables when the variables have deep attribute trees."""
+import itertools
+import tracemalloc
+
+from common import measure, print_results
+from scope import Scope
+
+
+def build_scope(variables=100, depth=10, width=3):
+  """Returns a scope with ``variables`` top level variables, each used with
+  ``width`` attribute chains of ``depth`` attributes; every other one is
+  defined first."""
+  scope = Scope()
+  child = scope.create_child()
+  for i in range(variables):
+    name = 'var_' + str(i)
+    if i % 2 == 0:
+      child.add_variable(name, 'changed')
+    for j in range(width):
+      trail = ['attr_' + str(j)] + ['a' + str(k) for k in range(depth - 1)]
+      child.add_attribute(name, trail, 'used')
+  return scope
+
+
+def build_facts_scope(width=4, depth=6):
+  """Returns a scope in which every attribute path of a tree shaped like
+  ``ansible_facts``, ``width`` keys per level and ``depth`` levels deep, is used."""
+  scope = Scope()
+  keys = ['key_' + str(i) for i in range(width)]
+  for path in itertools.product(keys, repeat=depth - 1):
+    scope.add_attribute('facts', list(path), 'used')
+  return scope
+
+
+def nested_scope(depth):
+  scope = Scope()
+  for i in range(depth):
+    scope = scope.create_child()
+  return scope
+
+
+def scan_memory(variables=1000, accesses=100, history_size=0):
+  """Returns the bytes allocated by a scope in which each of ``variables``
+  variables and one attribute of it are accessed ``accesses`` times."""
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  scope = Scope(history_size=history_size)
+  for i in range(variables):
+    name = 'var_' + str(i)
+    for j in range(accesses):
+      scope.add_attribute(name, ['attr'], 'used' if j % 2 else 'referenced')
+  after = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  return after - before
+
+
+def run():
+  results = [measure('Scope(): root scope with magic variables', Scope, number=100)]
+  for depth in (1, 10, 50):
+    scope = nested_scope(depth)
+
+    def access():
+      for i in range(100):
+        name = 'var_' + str(i)
+        scope.add_variable(name, 'used')
+        scope.add_attribute(name, ['attr'], 'used')
+        scope.is_magic(name)
+
+    results.append(measure('add and look up 100 variables: depth {0}'.format(depth), access, number=10))
+  for variables, depth in [(100, 3), (100, 10), (20, 50)]:
+    scope = build_scope(variables=variables, depth=depth)
+    name = '{0} variables, depth {1}'.format(variables, depth)
+    results.append(measure('get_undefined: ' + name, scope.get_undefined, number=10))
+    results.append(measure('get_all: ' + name, scope.get_all, number=10))
+  scope = build_facts_scope()
+  results.append(measure('get_undefined: facts tree of 1024 leaves, depth 6', scope.get_undefined, number=10))
+  results.append(measure('iter_undefined: first leaf of the facts tree',
+                         lambda: next(scope.iter_undefined()), number=100))
+  for history_size, label in [(0, 'no history'), (10, 'history of 10'), (None, 'full history')]:
+    results.append({
+      'name': 'memory: 1000 variables x 100 accesses, ' + label,
+      'bytes': scan_memory(history_size=history_size),
+    })
+  return results
+
+
+def print_scope_results(results):
+  for result in results:
+    if 'bytes' in result:
+      print('{0:<50} {1:>12.1f} KiB'.format(result['name'], result['bytes'] / 1024.0))
+    else:
+      print_results([result])
+
+
+if __name__ == '__main__':
+  print_scope_results(run())
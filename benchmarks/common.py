@@ -0,0 +1,111 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import sys
+import timeit
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_DIR = os.path.join(ROOT, 'ansible_var_checker')
+CORPUS_DIR = os.path.join(ROOT, 'test-ansible-project')
+
+# the package uses top level imports such as ``import jinja``
+if PACKAGE_DIR not in sys.path:
+  sys.path.insert(0, PACKAGE_DIR)
+
+CONDITION_KEYS = ['when', 'failed_when', 'changed_when']
+
+
+def iter_corpus_files(path=CORPUS_DIR):
+  for root, dirs, files in os.walk(path):
+    dirs.sort()
+    for filename in sorted(files):
+      if filename.endswith('.yml') or filename.endswith('.yaml'):
+        yield os.path.join(root, filename)
+
+
+def _iter_strings(value, key=None, conditions=False):
+  if isinstance(value, dict):
+    for k, v in value.items():
+      for item in _iter_strings(v, key=k, conditions=conditions):
+        yield item
+  elif isinstance(value, list):
+    for v in value:
+      for item in _iter_strings(v, key=key, conditions=conditions):
+        yield item
+  elif key in CONDITION_KEYS:
+    # bare expressions, PlaybookParser passes them to jinja.infer_expression
+    if conditions and value is not None:
+      yield str(value)
+  elif isinstance(value, str) and not conditions:
+    yield value
+
+
+def load_corpus(path=CORPUS_DIR, conditions=False):
+  """Returns every string scalar found in the YAML files under ``path``,
+  in a stable order and with duplicates kept. The ``when``, ``failed_when``
+  and ``changed_when`` conditions are left out, or with ``conditions`` are
+  the only strings returned."""
+  strings = []
+  for filename in iter_corpus_files(path):
+    with open(filename, 'r') as f:
+      try:
+        documents = list(yaml.safe_load_all(f))
+      except yaml.YAMLError:
+        continue
+    for document in documents:
+      strings.extend(_iter_strings(document, conditions=conditions))
+  return strings
+
+
+def loadable_playbooks(path=CORPUS_DIR):
+  """Returns the playbooks directly under ``path`` which the analyzer can load
+  with the installed ansible version."""
+  from analysis import analyze_file
+  playbooks = []
+  for filename in sorted(os.listdir(path)):
+    if not filename.endswith('.yml'):
+      continue
+    playbook = os.path.join(path, filename)
+    try:
+      analyze_file(playbook, basedir=path)
+    except Exception:
+      continue
+    playbooks.append(playbook)
+  return playbooks
+
+
+def generate_template(variables=300, statements=3000):
+  """Returns a template of ``statements`` lines, each using one of ``variables``
+  top level variables with a couple of attributes."""
+  lines = []
+  for i in range(statements):
+    name = 'var_' + str(i % variables)
+    if i % 3 == 0:
+      lines.append('{{ ' + name + '.attr_' + str(i % 7) + ' }}')
+    elif i % 3 == 1:
+      lines.append('{% if ' + name + '.enabled %}{{ ' + name + '.value }}{% endif %}')
+    else:
+      lines.append('{% for item in ' + name + '.items %}{{ item.name }}{% endfor %}')
+  return '\n'.join(lines)
+
+
+def measure(name, func, number=1, repeat=5, **extra):
+  """Times ``func`` and returns a result record; times are in seconds per call."""
+  timings = timeit.repeat(func, number=number, repeat=repeat)
+  result = {
+    'name': name,
+    'number': number,
+    'repeat': repeat,
+    'best': min(timings) / number,
+    'mean': sum(timings) / len(timings) / number,
+  }
+  result.update(extra)
+  return result
+
+
+def print_results(results):
+  for result in results:
+    line = '{0:<50} best {1:>12.3f}us  mean {2:>12.3f}us'.format(
+      result['name'], result['best'] * 1e6, result['mean'] * 1e6)
+    print(line)
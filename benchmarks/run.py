@@ -0,0 +1,92 @@
+"""Runs the benchmark scripts and writes their results as JSON.
+
+  python benchmarks/run.py                      # every bench_*.py
+  python benchmarks/run.py infer scope          # bench_infer.py and bench_scope.py
+  python benchmarks/run.py -o results.json --compare previous.json
+"""
+import argparse
+import contextlib
+import datetime
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import common
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def available_benchmarks():
+  return sorted(filename[len('bench_'):-len('.py')] for filename in os.listdir(BENCHMARK_DIR)
+                if filename.startswith('bench_') and filename.endswith('.py'))
+
+
+def git_revision():
+  try:
+    return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=common.ROOT,
+                                   stderr=subprocess.STDOUT).decode('utf-8').strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def run_benchmarks(names):
+  results = {}
+  # anything the code under test prints must not end up in the JSON on stdout
+  with contextlib.redirect_stdout(sys.stderr):
+    for name in names:
+      module = importlib.import_module('bench_' + name)
+      results[name] = list(module.run())
+  return results
+
+
+def compare(results, previous):
+  """Prints the ratio of every best time to the one with the same name in previous."""
+  for name, records in sorted(results.items()):
+    previous_records = dict((record['name'], record) for record in previous.get(name, []))
+    for record in records:
+      previous_record = previous_records.get(record['name'])
+      if 'best' not in record or previous_record is None or not previous_record.get('best'):
+        continue
+      print('{0:<60} {1:>8.2f}x'.format(name + ': ' + record['name'], record['best'] / previous_record['best']))
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Run the benchmarks and write the results as JSON')
+  parser.add_argument('benchmarks', nargs='*', help='Benchmarks to run (default: all of ' + ', '.join(available_benchmarks()) + ')')
+  parser.add_argument('-o', '--output', help='File to write the JSON results to (default: stdout)')
+  parser.add_argument('--compare', help='JSON results of an earlier run to compare the best times with')
+  args = parser.parse_args()
+
+  names = args.benchmarks or available_benchmarks()
+  for name in names:
+    if name not in available_benchmarks():
+      parser.error('unknown benchmark ' + name)
+
+  output = {
+    'timestamp': datetime.datetime.utcnow().isoformat() + 'Z',
+    'revision': git_revision(),
+    'python': platform.python_version(),
+    'platform': platform.platform(),
+    'results': run_benchmarks(names),
+  }
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(output, f, indent=2, sort_keys=True)
+    for name in names:
+      print('--- ' + name)
+      common.print_results(record for record in output['results'][name] if 'best' in record)
+  else:
+    json.dump(output, sys.stdout, indent=2, sort_keys=True)
+    print('')
+
+  if args.compare:
+    with open(args.compare, 'r') as f:
+      compare(output['results'], json.load(f)['results'])
+
+
+if __name__ == '__main__':
+  main()
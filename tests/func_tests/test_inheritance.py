@@ -4,6 +4,7 @@ from jinja2 import PackageLoader, Environment
 
 from jinja2schema.config import Config
 from jinja2schema.core import infer
+from jinja2schema.loader import get_loader
 from jinja2schema.model import Dictionary, Scalar
 
 
@@ -113,3 +114,24 @@ def test_extend_with_block_override_4(env, config):
         'name': Scalar(label='name', linenos=[3]),
     })
     assert struct == expected_struct
+
+
+
+def test_include_cache(config):
+    loader = get_loader(config)
+    loader.clear()
+    template = '{% include "include_1.html" %}\n{% include "include_1.html" %}'
+    expected_struct = Dictionary({
+        'var': Dictionary({
+            'x': Scalar(label='x', linenos=[1]),
+            'y': Scalar(label='y', linenos=[1]),
+        }, label='var', linenos=[1]),
+    })
+
+    struct = infer(template, config, cache=None)
+    assert struct == expected_struct
+    assert loader.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+    struct['var']['x'].label = 'changed'
+    assert infer(template, config, cache=None) == expected_struct
+    assert loader.stats()['hits'] == 3
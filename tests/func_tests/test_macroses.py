@@ -6,7 +6,7 @@ from jinja2schema.core import parse, infer
 from jinja2schema.visitors.stmt import visit_macro
 from jinja2schema.exceptions import MergeException, InvalidExpression
 from jinja2schema.model import Dictionary, Scalar
-from jinja2schema.macro import Macro
+from jinja2schema.macro import Macro, macro_summaries
 
 
 def test_macro_visitor_1():
@@ -144,3 +144,39 @@ def test_macro_wrong_args():
     with pytest.raises(InvalidExpression) as e:
         infer(template)
     assert str(e.value) == 'line 6: incorrect usage of "format_hello". variable keyword argument "missing" is passed'
+
+
+
+def test_macro_summary_cache():
+    template = '''
+    {% macro input(name, value='') -%}
+        <input name="{{ name }}" value="{{ value }}">{{ x.y }}
+    {%- endmacro %}
+    '''
+    node = parse(template).find(nodes.Macro)
+    macro_summaries.clear()
+
+    first_macroses = {}
+    first_struct = visit_macro(node, first_macroses)
+    second_macroses = {}
+    second_struct = visit_macro(node, second_macroses)
+    assert macro_summaries.stats()['hits'] == 1
+    assert second_struct == first_struct
+    assert second_struct['x'] is not first_struct['x']
+    assert second_macroses['input'].args == first_macroses['input'].args
+
+
+def test_macro_summary_cache_with_called_macro():
+    template = '''
+    {% macro input(name) -%}
+        <input name="{{ name }}">{{ label(name) }}
+    {%- endmacro %}
+    '''
+    node = parse(template).find(nodes.Macro)
+    macro_summaries.clear()
+
+    # the structure depends on the "label" macro, so it is not reused
+    for i in range(2):
+        visit_macro(node, {'label': Macro('label', [('text', Scalar())], [])})
+    assert macro_summaries.stats()['hits'] == 0
+    assert len(macro_summaries) == 0
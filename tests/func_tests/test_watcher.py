@@ -0,0 +1,71 @@
+# coding: utf-8
+import os
+
+import pytest
+
+from analysis import analyze_file, reset_sessions
+from file_handler import FileHandler
+from watcher import Watcher
+
+
+FILES = {
+    'main.yml': '- import_playbook: included.yml\n',
+    'included.yml': '''\
+- hosts: all
+  vars_files:
+  - vars.yml
+  tasks:
+  - import_tasks: tasks.yml
+''',
+    'tasks.yml': '- debug: msg="{{ from_tasks }}"\n',
+    'vars.yml': 'x: 1\n',
+}
+
+
+def write(path, content, mtime):
+    with open(path, 'w') as f:
+        f.write(content)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def project(tmpdir):
+    basedir = str(tmpdir)
+    for name, content in FILES.items():
+        write(os.path.join(basedir, name), content, 1000000000)
+    reset_sessions()
+    yield basedir
+    reset_sessions()
+
+
+def get_undefined(summary):
+    undefined = set()
+    for scope in summary.scopes:
+        undefined.update(scope['undefined'])
+    return undefined
+
+
+@pytest.mark.parametrize('name', ['included.yml', 'tasks.yml', 'vars.yml'])
+def test_poll_reanalyzes_playbook_when_included_file_changes(project, name):
+    summaries = []
+    watcher = Watcher(FileHandler('main.yml', file=True, basedir=project),
+                      lambda filename: analyze_file(filename, basedir=project),
+                      summaries.append)
+    watcher.start()
+    assert len(summaries) == 1
+    assert get_undefined(summaries[0]) == set(['from_tasks'])
+    assert watcher.poll() == set()
+
+    content = FILES[name]
+    if name == 'tasks.yml':
+        content = '- debug: msg="{{ from_tasks }} {{ added }}"\n'
+    elif name == 'included.yml':
+        content = content.replace('  tasks:\n', '  tasks:\n  - debug: msg="{{ added }}"\n')
+    else:
+        content = 'y: 2\n'
+    write(os.path.join(project, name), content, 1000000100)
+
+    assert watcher.poll() == set([os.path.join(project, 'main.yml')])
+    assert len(summaries) == 2
+    if name != 'vars.yml':
+        assert get_undefined(summaries[1]) == set(['from_tasks', 'added'])
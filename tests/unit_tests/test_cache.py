@@ -0,0 +1,56 @@
+# coding: utf-8
+from jinja2schema.cache import LRUCache
+from jinja2schema.config import Config
+from jinja2schema.core import infer
+from jinja2schema.model import Dictionary, Scalar
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats() == {
+        'hits': 3,
+        'misses': 1,
+        'evictions': 1,
+        'size': 2,
+        'maxsize': 2,
+    }
+
+    cache.resize(1)
+    assert len(cache) == 1
+    assert cache.evictions == 2
+
+    cache.resize(0)
+    cache.put('d', 4)
+    assert 'd' not in cache
+
+
+def test_infer_cache():
+    cache = LRUCache()
+    # simple expressions do not reach the engine, see infer_simple
+    template = '{{ x.y | upper }}'
+    expected_struct = Dictionary({
+        'x': Dictionary({
+            'y': Scalar(label='y', linenos=[1]),
+        }, label='x', linenos=[1]),
+    })
+
+    struct = infer(template, cache=cache)
+    assert struct == expected_struct
+    assert cache.stats()['misses'] == 1
+
+    del struct['x']['y']
+    struct = infer(template, cache=cache)
+    assert struct == expected_struct
+    assert cache.stats()['hits'] == 1
+
+    infer(template, Config(BOOLEAN_CONDITIONS=True), cache=cache)
+    assert cache.stats()['misses'] == 2
+    assert len(cache) == 2
@@ -433,4 +433,42 @@ def test_length_filter():
     assert rtype == Scalar(label='xs', linenos=[1])
     assert struct == Dictionary({
         'xs': List(Variable(), label='xs', linenos=[1]),
-    })
\ No newline at end of file
+    })
+
+
+def test_custom_filter_index():
+    def dummy_filter(value1, value2, value3='test', *args):
+      return value2
+    config = Config(CUSTOM_FILTERS=[{'customfilter': dummy_filter}], RAISE_ON_NO_FILTER=True)
+    signature = config.get_filter('customfilter')
+    assert signature.min_arg_count == 2
+    assert signature.max_arg_count == 3
+    assert signature.has_varargs
+    assert not signature.has_kwargs
+    assert config.get_filter('otherfilter') is None
+
+    template = '''{{ x|otherfilter }}'''
+    node = parse(template).find(nodes.Filter)
+    with pytest.raises(InvalidExpression) as e:
+        visit_filter(node, get_scalar_context(node), config=config)
+    assert 'unknown filter' in str(e.value)
+
+    config.add_filters({'otherfilter': dummy_filter})
+    assert config.get_filter('otherfilter').max_arg_count == 3
+    config.CUSTOM_FILTERS.append({'anotherfilter': dummy_filter})
+    assert config.get_filter('anotherfilter') is not None
+
+
+def test_custom_filter_index_is_built_on_first_lookup():
+    class FilterModule(object):
+        calls = 0
+
+        def filters(self):
+            FilterModule.calls += 1
+            return {'customfilter': lambda value: value}
+
+    config = Config(CUSTOM_FILTERS=[FilterModule()])
+    assert FilterModule.calls == 0
+    assert config.get_filter('customfilter') is not None
+    assert config.get_filter('otherfilter') is None
+    assert FilterModule.calls == 1
@@ -0,0 +1,33 @@
+# coding: utf-8
+import pytest
+from jinja2 import TemplateSyntaxError
+
+from jinja2schema.core import infer, infer_expression, parse_expression
+from jinja2schema.model import Dictionary, Scalar
+
+
+@pytest.mark.parametrize('expression', [
+    'x',
+    'x.y["z"]',
+    'x is defined and x.y',
+    'not (a or b.c)',
+    'r.rc != 0 and "failed" in r.stdout',
+    'items | length > 0',
+])
+def test_same_as_template(expression):
+    assert infer_expression(expression, cache=None) == infer('{{ ' + expression + ' }}', cache=None)
+
+
+def test_simple_path():
+    assert infer_expression('x.y') == Dictionary({
+        'x': Dictionary({
+            'y': Scalar(label='y', linenos=[1]),
+        }, label='x', linenos=[1]),
+    })
+
+
+def test_chunk_after_expression():
+    with pytest.raises(TemplateSyntaxError):
+        parse_expression('x y')
+    with pytest.raises(TemplateSyntaxError):
+        infer_expression('x }} {{ y')
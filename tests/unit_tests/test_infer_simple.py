@@ -0,0 +1,56 @@
+# coding: utf-8
+import pytest
+
+from jinja2schema.core import infer, infer_counts, infer_from_node, infer_simple, parse
+from jinja2schema.model import Dictionary, Scalar
+
+
+def test_literal():
+    assert infer_simple('present') == Dictionary()
+    assert infer_simple('/etc/{ not a template }}') == Dictionary()
+
+
+def test_simple_expressions():
+    assert infer_simple('{{ x }}') == Dictionary({
+        'x': Scalar(label='x', linenos=[1]),
+    })
+    assert infer_simple('/home/{{ x.y }}/\n{{ x["z"] }}') == Dictionary({
+        'x': Dictionary({
+            'y': Scalar(label='y', linenos=[1]),
+            'z': Scalar(label='z', linenos=[2]),
+        }, label='x', linenos=[1, 2]),
+    })
+
+
+@pytest.mark.parametrize('template', [
+    '{{ x | upper }}',
+    '{{ x.0 }}',
+    '{{ x[0] }}',
+    '{{ true }}',
+    '{{- x }}',
+    '{% if x %}{{ x.y }}{% endif %}',
+    '{# comment #}',
+    '{{ x }}{{ x.y }}',
+])
+def test_left_to_the_engine(template):
+    assert infer_simple(template) is None
+
+
+@pytest.mark.parametrize('template', [
+    'present',
+    '{{ a }}',
+    "{{ a.b['c d'].e }} and {{ a.b.f }}\n{{ g }}",
+    '{{a.b}}{{ a.c }}',
+])
+def test_same_as_engine(template):
+    assert infer_simple(template) == infer_from_node(parse(template))
+
+
+def test_counts():
+    counts = dict(infer_counts)
+    infer('present', cache=None)
+    infer('{{ x.y }}', cache=None)
+    infer('{{ x | upper }}', cache=None)
+    assert infer_counts['literal'] == counts['literal'] + 1
+    assert infer_counts['simple'] == counts['simple'] + 1
+    assert infer_counts['engine'] == counts['engine'] + 1
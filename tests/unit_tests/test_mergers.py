@@ -0,0 +1,47 @@
+# coding: utf-8
+import pytest
+
+from jinja2schema.exceptions import MergeException
+from jinja2schema.mergers import is_compatible, merge
+from jinja2schema.model import Dictionary, List, Scalar, Tuple, Variable
+
+
+@pytest.mark.parametrize('first, second', [
+    (Scalar(), Scalar()),
+    (Scalar(), Variable()),
+    (Variable(), Dictionary()),
+    (Dictionary({'x': Scalar()}), Dictionary({'x': Variable(), 'y': List(Scalar())})),
+    (List(Dictionary({'x': Scalar()})), List(Variable())),
+    (Tuple([Scalar()], may_be_extended=True), Tuple([Variable(), Scalar()])),
+    (Dictionary(), List(Scalar())),
+])
+def test_compatible(first, second):
+    merge(first, second)
+    assert is_compatible(first, second)
+
+
+@pytest.mark.parametrize('first, second', [
+    (Scalar(), Dictionary()),
+    (List(Scalar()), Scalar()),
+    (Dictionary({'x': Dictionary({'y': Scalar()})}), Dictionary({'x': Dictionary({'y': List(Scalar())})})),
+    (Tuple([Scalar()]), Tuple([Scalar(), Scalar()])),
+    (List(Scalar()), List(Dictionary())),
+])
+def test_incompatible(first, second):
+    with pytest.raises(MergeException):
+        merge(first, second)
+    assert not is_compatible(first, second)
+
+
+def test_tuple_and_list():
+    for first, second in [(Tuple(None), List(Scalar())), (List(Scalar()), Tuple([Scalar()]))]:
+        with pytest.raises(TypeError):
+            is_compatible(first, second)
+        with pytest.raises(TypeError):
+            merge(first, second)
+
+    tuple_item = Tuple(None)
+    tuple_item.items = None
+    with pytest.raises(TypeError):
+        is_compatible(tuple_item, List(Scalar()))
+    assert tuple_item.items is None
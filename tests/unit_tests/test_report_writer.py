@@ -0,0 +1,45 @@
+# coding: utf-8
+import json
+from io import StringIO
+
+import pytest
+
+from report_writer import JsonWriter, YamlWriter
+from scope import Scope
+
+
+def build_scope():
+    scope = Scope(history_size=None)
+    scope.add_variable('defined', 'registered')
+    scope.add_attribute('x', ['y', 'z'], 'used')
+    scope.add_attribute('x', ['w'], 'changed')
+    scope.add_attribute('x', ['y', 'v'], 'used')
+    scope.add_variable('inventory_hostname', 'used')
+    return scope
+
+
+@pytest.mark.parametrize('with_history', [False, True])
+def test_write_paths_matches_write(with_history):
+    scope = build_scope()
+    for paths, dict_val in [(scope.iter_undefined(with_history=with_history), scope.get_undefined(with_history=with_history)),
+                            (scope.iter_all(with_history=with_history), scope.get_all(with_history=with_history))]:
+        expected = StringIO()
+        YamlWriter(expected).write(dict_val, current_tab='  ')
+        output = StringIO()
+        YamlWriter(output).write_paths(paths, current_tab='  ')
+        assert output.getvalue() == expected.getvalue()
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'sort_keys': True}, {'indent': 2}])
+def test_json_writer(kwargs):
+    value = build_scope().get_all(with_history=True)
+    output = StringIO()
+    JsonWriter(output, **kwargs).write(value)
+    assert output.getvalue() == json.dumps(value, **kwargs)
+    assert json.loads(output.getvalue()) == value
+
+
+def test_json_writer_non_string_keys():
+    output = StringIO()
+    JsonWriter(output).write({1: [None, 'a']})
+    assert json.loads(output.getvalue()) == {'1': [None, 'a']}
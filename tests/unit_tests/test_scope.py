@@ -0,0 +1,63 @@
+# coding: utf-8
+from scope import Scope
+
+
+def test_child_scope_records_into_root():
+    root = Scope()
+    child = root.create_child().create_child()
+    child.add_variable('item', 'registered')
+    child.add_attribute('x', ['y'], 'used')
+
+    assert root.get_all() == {'item': {}, 'x': {'y': {}}}
+    assert root.get_undefined() == {'x': {'y': {}}}
+    assert child.variables == {}
+
+
+def test_child_scope_does_not_report_magic_variables():
+    root = Scope()
+    child = root.create_child()
+
+    assert root.is_magic('inventory_hostname')
+    assert not child.is_magic('inventory_hostname')
+    child.add_variable('inventory_hostname', 'registered')
+    assert not child.is_magic('inventory_hostname')
+    assert root.is_magic('inventory_hostname')
+
+
+def test_magic_variable_keeps_full_history():
+    scope = Scope(history_size=None)
+    scope.add_variable('inventory_hostname', 'used')
+    scope.add_variable('inventory_hostname', 'changed')
+    scope.add_variable('inventory_hostname', 'used')
+    scope.add_attribute('ansible_facts', ['ansible_lsb', 'codename'], 'used')
+    scope.add_attribute('ansible_facts', ['ansible_lsb', 'codename'], 'changed')
+
+    assert scope.variables['inventory_hostname'].actions == ['magic', 'used', 'changed', 'used']
+    codename = scope.variables['ansible_facts'].attributes['ansible_lsb'].attributes['codename']
+    assert codename.actions == ['magic', 'used', 'changed']
+
+
+def test_magic_variable_keeps_history_size():
+    scope = Scope(history_size=2)
+    scope.add_variable('inventory_hostname', 'used')
+    scope.add_variable('inventory_hostname', 'changed')
+
+    assert scope.variables['inventory_hostname'].actions == ['used', 'changed']
+
+
+def test_names_that_are_not_strings_keep_their_actions():
+    scope = Scope(history_size=None)
+    scope.add_variable(1, 'changed')
+    scope.add_variable(1, 'used')
+    scope.add_attribute(1, ['x'], 'used')
+
+    assert scope.get_all(with_history=True) == {'1': {'_actions': ['changed', 'used', 'used'], 'x': ['used']}}
+
+
+def test_history_is_grouped_by_type_without_history_size():
+    scope = Scope()
+    for action in ['used', 'changed', 'used', 'changed']:
+        scope.add_variable('x', action)
+
+    assert scope.get_all(with_history=True) == {'x': ['used', 'changed', 'changed', 'used']}
+    assert Scope(history_size=None).get_all() == {}